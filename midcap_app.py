@@ -6,7 +6,21 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 from datetime import datetime, timedelta
+import ast
+import copy
+import functools
+import hashlib
+import heapq
+import json
+import operator
+import os
+import shutil
+import sqlite3
+import threading
 import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import closing, contextmanager
 from functools import wraps
 from io import BytesIO
 import statistics
@@ -16,6 +30,16 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
+from midcap_kernels import (
+    BARS_52W, MACD_FAST, MACD_SIGNAL, MACD_SLOW, RSI_PERIOD, atr_matrix, compute_momentum_matrix,
+    right_align, supertrend_from_atr, supertrend_matrix
+)
+
+# POSIX file locks for price store writers (unavailable on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # ============================================================================
 # STREAMLIT CONFIGURATION
@@ -567,7 +591,7 @@ INDIAN_STOCKS = {
         "ABGSHIP.NS": "ABG Shipyard Limited",
         "BEL.NS": "Bharat Electronics Limited",
         "BHARATIDIL.NS": "Bharati Defence And Infrastructure Limited",
-        "RDEL.NS": "Reliance Defence and Engineering Limited"
+        "RDEL.NS": "Reliance Defence and Engineering Limited",
         "COCHINSHIP.BO": "COCHIN SHIPYARD LTD."
     },
 
@@ -10021,91 +10045,123 @@ SECTOR_BENCHMARKS = {
 }
 
 # ============================================================================
-# TECHNICAL ANALYSIS FUNCTIONS
+# INDICATOR RESULT CACHE
 # ============================================================================
-@st.cache_data(ttl=3600)
-def fetch_price_history(ticker, period="3mo"):
-    """Fetch historical price data for technical analysis"""
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
-        if hist.empty:
-            return None
-        return hist
-    except:
-        return None
+# Upper bound on cached indicator results across all tickers and parameters
+INDICATOR_CACHE_SIZE = 20000
 
-def calculate_supertrend(high, low, close, period=10, multiplier=3):
-    """Calculate SuperTrend indicator"""
-    try:
-        # Calculate ATR (Average True Range)
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-        
-        # Calculate basic upper and lower bands
-        hl_avg = (high + low) / 2
-        upper_band = hl_avg + (multiplier * atr)
-        lower_band = hl_avg - (multiplier * atr)
-        
-        # Initialize SuperTrend
-        supertrend = pd.Series(index=close.index, dtype=float)
-        direction = pd.Series(index=close.index, dtype=int)
-        
-        # Calculate SuperTrend
-        for i in range(1, len(close)):
-            if pd.isna(upper_band.iloc[i]) or pd.isna(lower_band.iloc[i]):
-                continue
-                
-            # Current upper and lower bands
-            curr_upper = upper_band.iloc[i]
-            curr_lower = lower_band.iloc[i]
-            prev_close = close.iloc[i-1]
-            curr_close = close.iloc[i]
-            
-            # Adjust bands
-            if curr_upper < upper_band.iloc[i-1] or prev_close > upper_band.iloc[i-1]:
-                upper_band.iloc[i] = curr_upper
-            else:
-                upper_band.iloc[i] = upper_band.iloc[i-1]
-                
-            if curr_lower > lower_band.iloc[i-1] or prev_close < lower_band.iloc[i-1]:
-                lower_band.iloc[i] = curr_lower
-            else:
-                lower_band.iloc[i] = lower_band.iloc[i-1]
-            
-            # Determine trend direction
-            if i == 1:
-                direction.iloc[i] = 1 if curr_close <= lower_band.iloc[i] else -1
-                supertrend.iloc[i] = lower_band.iloc[i] if direction.iloc[i] == 1 else upper_band.iloc[i]
+class IndicatorCache:
+    """Thread-safe LRU cache of indicator results.
+    
+    Keys are (ticker, *bar_window_key, indicator, *params), so an entry is
+    reused until the bar window changes (a new bar arrives, the live bar
+    moves, or the history is longer or starts elsewhere) and is evicted
+    least-recently-used once the cache is full. Cached values are
+    shared: callers must not mutate them.
+    """
+    
+    def __init__(self, max_entries=INDICATOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(self, key):
+        """Return (found, value) and mark the entry as recently used"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def store(self, key, value):
+        """Insert or refresh an entry, evicting the least recently used beyond the bound"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def __len__(self):
+        return len(self._entries)
+
+@st.cache_resource
+def get_indicator_cache():
+    """Process-wide indicator cache shared by all sessions"""
+    return IndicatorCache()
+
+# ============================================================================
+# REQUEST COALESCING
+# ============================================================================
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+    
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or exception). Nothing is
+    kept once the call finishes, so this complements the caches rather than
+    replacing them. Results are shared: callers must not mutate them.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, func, *args, **kwargs):
+        """Run func(*args, **kwargs) once per key across concurrent callers"""
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._in_flight[key] = call
+                self.calls += 1
             else:
-                prev_supertrend = supertrend.iloc[i-1]
-                prev_direction = direction.iloc[i-1]
-                
-                if prev_direction == 1 and curr_close >= lower_band.iloc[i]:
-                    direction.iloc[i] = -1
-                    supertrend.iloc[i] = upper_band.iloc[i]
-                elif prev_direction == -1 and curr_close <= upper_band.iloc[i]:
-                    direction.iloc[i] = 1
-                    supertrend.iloc[i] = lower_band.iloc[i]
-                else:
-                    direction.iloc[i] = prev_direction
-                    supertrend.iloc[i] = lower_band.iloc[i] if direction.iloc[i] == 1 else upper_band.iloc[i]
+                self.shared += 1
         
-        # Return signal: 1 for bullish (price > supertrend), -1 for bearish
-        signal = (close > supertrend).astype(int) * 2 - 1
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
         
-        return {
-            'supertrend': supertrend,
-            'direction': direction,
-            'signal': signal.iloc[-1] if len(signal) > 0 else 0,
-            'upper_band': upper_band,
-            'lower_band': lower_band
-        }
-    except Exception as e:
+        try:
+            call['result'] = func(*args, **kwargs)
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            call['done'].set()
+
+@st.cache_resource
+def get_singleflight():
+    """Process-wide request coalescer shared by all sessions"""
+    return SingleFlight()
+
+def bar_window_key(close):
+    """(first timestamp, bar count, last timestamp, last close) of a close series, or None.
+    
+    Indicators depend on the whole window, so a longer or shifted history
+    must not reuse a result cached for another window.
+    """
+    valid = close.dropna()
+    if valid.empty:
         return None
+    return (str(valid.index[0]), len(valid), str(valid.index[-1]), float(valid.iloc[-1]))
+
+# ============================================================================
+# TECHNICAL ANALYSIS FUNCTIONS
+# ============================================================================
+# Longest lookback any indicator needs (52-week high/low) and its calendar span
+HISTORY_LOOKBACK_PERIOD = "1y"
+HISTORY_LOOKBACK_OFFSET = pd.DateOffset(years=1)
 
 def is_near_52w_high(price, high_52w, threshold=0.95):
     """Check if current price is near 52-week high"""
@@ -10113,47 +10169,580 @@ def is_near_52w_high(price, high_52w, threshold=0.95):
         return False
     return (price / high_52w) >= threshold
 
-def get_technical_signals(ticker):
-    """Get comprehensive technical signals for a stock"""
-    hist = fetch_price_history(ticker, period="6mo")
-    if hist is None or len(hist) < 50:
-        return None
+# ============================================================================
+# BATCHED INDICATOR ENGINE
+# ============================================================================
+# Tickers per yf.download request when building price matrices
+PRICE_DOWNLOAD_CHUNK = 200
+
+# Bars required before technical signals are reported
+MIN_TECHNICAL_BARS = 50
+
+def _technical_signal_dict(current_price, supertrend_signal, supertrend_value, high_52w, low_52w,
+                           sma_20, sma_50, avg_volume, recent_volume):
+    """Assemble the technical signal dict"""
+    return {
+        'supertrend_signal': supertrend_signal,
+        'supertrend_value': supertrend_value if not pd.isna(supertrend_value) else None,
+        'near_52w_high': is_near_52w_high(current_price, high_52w),
+        'price_vs_52w_high': (current_price / high_52w) if high_52w > 0 else 0,
+        'high_52w': high_52w,
+        'low_52w': low_52w,
+        'above_sma20': current_price > sma_20 if not pd.isna(sma_20) else False,
+        'above_sma50': current_price > sma_50 if not pd.isna(sma_50) else False,
+        'volume_surge': recent_volume > avg_volume * 1.2 if avg_volume > 0 else False,
+        'current_price': current_price
+    }
+
+def _download_price_frames(tickers, **download_kwargs):
+    """Download OHLCV for many tickers in one request as (dates x tickers) frames per field.
     
+    Concurrent requests for the same tickers and arguments share one download.
+    """
+    key = ('prices', tuple(tickers), tuple(sorted(download_kwargs.items())))
+    return get_singleflight().do(key, _download_price_frames_uncoalesced, tickers, **download_kwargs)
+
+def _download_price_frames_uncoalesced(tickers, **download_kwargs):
+    """Bulk yf.download behind _download_price_frames"""
     try:
-        # Calculate SuperTrend
-        supertrend_data = calculate_supertrend(
-            hist['High'], 
-            hist['Low'], 
-            hist['Close']
+        data = yf.download(
+            list(tickers), group_by='column', auto_adjust=True,
+            progress=False, threads=True, **download_kwargs
+        )
+    except Exception:
+        return None
+    if data is None or data.empty:
+        return None
+    
+    prices = {}
+    for field in ['High', 'Low', 'Close', 'Volume']:
+        frame = data[field]
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame(tickers[0])
+        prices[field] = frame.reindex(columns=list(tickers)).astype(float)
+    return prices
+
+@st.cache_data(ttl=3600)
+def fetch_price_matrix(tickers, period=HISTORY_LOOKBACK_PERIOD):
+    """Cached bulk OHLCV download for a tuple of tickers"""
+    return _download_price_frames(tickers, period=period)
+
+def _concat_price_chunks(chunks):
+    """Join per-chunk price frames column-wise on the union of their dates"""
+    chunks = [chunk for chunk in chunks if chunk]
+    if not chunks:
+        return None
+    return {
+        field: pd.concat([chunk[field] for chunk in chunks], axis=1, sort=True)
+        for field in ['High', 'Low', 'Close', 'Volume']
+    }
+
+def load_price_frames(tickers, period=HISTORY_LOOKBACK_PERIOD):
+    """Aligned (dates x tickers) OHLCV frames for many tickers.
+    
+    The lookback period is served from the memory-mapped price store,
+    downloading only tickers that are missing or stale there. Other periods
+    use cached chunked bulk downloads.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    chunks = [tickers[start:start + PRICE_DOWNLOAD_CHUNK] for start in range(0, len(tickers), PRICE_DOWNLOAD_CHUNK)]
+    
+    if period == HISTORY_LOOKBACK_PERIOD:
+        stale = stale_price_store_tickers(tickers)
+        if stale:
+            downloaded = _concat_price_chunks(
+                _download_price_frames(stale[start:start + PRICE_DOWNLOAD_CHUNK], period=period)
+                for start in range(0, len(stale), PRICE_DOWNLOAD_CHUNK)
+            )
+            if downloaded:
+                try:
+                    write_price_store(downloaded)
+                except OSError:
+                    pass
+        frames = read_price_store(tickers)
+        if frames:
+            return frames
+    
+    return _concat_price_chunks(fetch_price_matrix(tuple(chunk), period) for chunk in chunks)
+
+# ============================================================================
+# MOMENTUM INDICATORS (RSI / MACD)
+# ============================================================================
+# RSI band treated as healthy momentum (trending, not overbought)
+RSI_MOMENTUM_RANGE = (40, 70)
+
+def get_momentum_signals_batch(tickers, period=HISTORY_LOOKBACK_PERIOD):
+    """RSI/MACD signals for many tickers, computing only those with a new last bar"""
+    tickers = list(dict.fromkeys(tickers))
+    fields = load_price_frames(tickers, period)
+    if not fields:
+        return {ticker: None for ticker in tickers}
+    
+    close = fields['Close']
+    cache = get_indicator_cache()
+    params = ('momentum', RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL)
+    results = {}
+    cache_keys = {}
+    for ticker in close.columns:
+        bar_key = bar_window_key(close[ticker])
+        if not bar_key:
+            continue
+        cache_keys[ticker] = (ticker, *bar_key, *params)
+        found, cached = cache.lookup(cache_keys[ticker])
+        if found:
+            results[ticker] = cached
+    
+    missing = [ticker for ticker in cache_keys if ticker not in results]
+    if missing:
+        ind = compute_momentum_matrix(close[missing].to_numpy(dtype=float))
+        for j, ticker in enumerate(missing):
+            if ind['bars'][j] < MACD_SLOW + MACD_SIGNAL or pd.isna(ind['macd_hist'][j]):
+                momentum = None
+            else:
+                momentum = {
+                    'rsi': float(ind['rsi'][j]),
+                    'macd': float(ind['macd'][j]),
+                    'macd_signal': float(ind['macd_signal'][j]),
+                    'macd_hist': float(ind['macd_hist'][j]),
+                    'macd_bullish': bool(ind['macd_hist'][j] > 0),
+                    'macd_cross_up': bool(ind['macd_hist'][j] > 0 and ind['prev_macd_hist'][j] <= 0),
+                    'last_bar': cache_keys[ticker][3]
+                }
+            cache.store(cache_keys[ticker], momentum)
+            results[ticker] = momentum
+    
+    return {ticker: results.get(ticker) for ticker in tickers}
+
+# ============================================================================
+# SUPERTREND PARAMETER SWEEP
+# ============================================================================
+SWEEP_PERIODS = [7, 10, 14, 20]
+SWEEP_MULTIPLIERS = [1.5, 2.0, 2.5, 3.0, 3.5]
+
+# Forward bars used to score each bullish bar
+SWEEP_HORIZON = 10
+
+def sweep_supertrend_matrix(high, low, close, periods=SWEEP_PERIODS, multipliers=SWEEP_MULTIPLIERS,
+                            horizon=SWEEP_HORIZON):
+    """Evaluate SuperTrend over a period x multiplier grid for every ticker column.
+    
+    ATR is computed once per period and the multipliers are broadcast as
+    extra columns, so each period needs a single pass of the band loop.
+    Returns one row per parameter pair with statistics pooled across tickers.
+    """
+    valid = ~np.isnan(close)
+    high, low, close = (right_align(m, valid) for m in (high, low, close))
+    n_tickers = close.shape[1]
+    multipliers = np.asarray(multipliers, dtype=float)
+    n_mult = len(multipliers)
+    
+    # Forward returns and next-bar returns, shared by every parameter pair
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forward = np.full_like(close, np.nan)
+        forward[:-horizon] = close[horizon:] / close[:-horizon] - 1
+        next_bar = np.full_like(close, np.nan)
+        next_bar[:-1] = close[1:] / close[:-1] - 1
+    forward_grid = np.tile(forward, n_mult)
+    next_bar_grid = np.tile(next_bar, n_mult)
+    
+    first_close = pd.DataFrame(close).bfill().to_numpy()[0]
+    buy_hold = np.nanmean(close[-1] / first_close - 1) * 100
+    
+    rows = []
+    for period in periods:
+        atr = atr_matrix(high, low, close, period)
+        _, _, _, direction = supertrend_from_atr(
+            np.tile(high, n_mult), np.tile(low, n_mult), np.tile(close, n_mult),
+            np.tile(atr, n_mult), np.repeat(multipliers, n_tickers)
         )
         
-        if not supertrend_data:
-            return None
+        bullish = direction == 1
+        scored = bullish & ~np.isnan(forward_grid)
+        hits = (scored & (forward_grid > 0)).sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
+        scored_count = scored.sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
+        fwd_sum = np.where(scored, forward_grid, 0).sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
         
-        # Get current price and 52-week high
-        current_price = hist['Close'].iloc[-1]
-        high_52w = hist['High'].rolling(window=252).max().iloc[-1]
+        # Long while bullish: compound next-bar returns per ticker, then average
+        held = np.where(bullish & ~np.isnan(next_bar_grid), next_bar_grid, 0)
+        strategy = (np.prod(1 + held, axis=0) - 1).reshape(n_mult, n_tickers).mean(axis=1)
         
-        # Additional technical indicators
-        sma_20 = hist['Close'].rolling(window=20).mean().iloc[-1]
-        sma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
+        entries = (bullish[1:] & (direction[:-1] == -1)).sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
+        bars = (~np.isnan(direction)).sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
+        bull_bars = bullish.sum(axis=0).reshape(n_mult, n_tickers).sum(axis=1)
+        
+        for k, multiplier in enumerate(multipliers):
+            rows.append({
+                'Period': period,
+                'Multiplier': multiplier,
+                'Bullish %': bull_bars[k] / bars[k] * 100 if bars[k] else None,
+                'Buy Signals': int(entries[k]),
+                'Hit Rate %': hits[k] / scored_count[k] * 100 if scored_count[k] else None,
+                f'Avg {horizon}-Bar Return %': fwd_sum[k] / scored_count[k] * 100 if scored_count[k] else None,
+                'Strategy Return %': strategy[k] * 100,
+                'Buy & Hold %': buy_hold
+            })
+    
+    return pd.DataFrame(rows)
+
+def run_supertrend_sweep(tickers, periods=SWEEP_PERIODS, multipliers=SWEEP_MULTIPLIERS,
+                         horizon=SWEEP_HORIZON, history_period=HISTORY_LOOKBACK_PERIOD):
+    """Parameter sweep for one or many tickers using bulk price history"""
+    fields = load_price_frames(tickers, history_period)
+    if not fields:
+        return pd.DataFrame()
+    close = fields['Close']
+    has_data = close.notna().sum() > max(periods) + horizon
+    if not has_data.any():
+        return pd.DataFrame()
+    
+    columns = close.columns[has_data]
+    return sweep_supertrend_matrix(
+        fields['High'][columns].to_numpy(dtype=float),
+        fields['Low'][columns].to_numpy(dtype=float),
+        close[columns].to_numpy(dtype=float),
+        periods, multipliers, horizon
+    )
+
+# ============================================================================
+# INCREMENTAL INDICATOR STATE
+# ============================================================================
+# History used to seed state for tickers seen for the first time (served
+# from the price store, so seeding shares its downloads)
+STATE_BOOTSTRAP_PERIOD = HISTORY_LOOKBACK_PERIOD
+
+# Gaps longer than this rebuild state from history instead of catching up
+STATE_MAX_CATCHUP_DAYS = 30
+
+# Bump when the state layout changes; states in another format are rebuilt
+STATE_FORMAT = 3
+
+# How long a catch-up check (latest finished bar and forming bar) is reused
+STATE_CHECK_TTL_SECONDS = 3600
+STATE_CHECK_CACHE_SIZE = 20000
+
+@st.cache_resource
+def get_state_check_cache():
+    """Process-wide catch-up checks keyed by ticker, shared by sessions and job threads"""
+    return TTLCache(STATE_CHECK_TTL_SECONDS, STATE_CHECK_CACHE_SIZE)
+
+def new_indicator_state(period=10, multiplier=3):
+    """Empty streaming indicator state for one ticker"""
+    return {
+        'format': STATE_FORMAT, 'period': period, 'multiplier': multiplier,
+        'last_date': None, 'bars': 0, 'prev_close': None,
+        'trs': deque(maxlen=period), 'tr_sum': 0.0,
+        'closes': deque(maxlen=50), 'close_sum_20': 0.0, 'close_sum_50': 0.0,
+        'volumes': deque(maxlen=20), 'volume_sum_20': 0.0,
+        'highs_52w': deque(),  # monotonic (bar, high) pairs, highest first
+        'lows_52w': deque(),  # monotonic (bar, low) pairs, lowest first
+        'final_upper': None, 'final_lower': None, 'direction': None, 'supertrend': None
+    }
+
+def update_indicator_state(state, date, high, low, close, volume):
+    """Fold one completed bar into the state in O(1); same rules as the batch engine"""
+    if close != close:  # NaN close: no bar for this ticker
+        return state
+    
+    bar = state['bars']
+    prev_close = state['prev_close']
+    
+    # ATR window
+    if prev_close is None:
+        tr = high - low
+    else:
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+    trs = state['trs']
+    if len(trs) == trs.maxlen:
+        state['tr_sum'] -= trs[0]
+    trs.append(tr)
+    state['tr_sum'] += tr
+    
+    # SuperTrend bands and direction
+    if len(trs) == state['period']:
+        atr = state['tr_sum'] / state['period']
+        hl_avg = (high + low) / 2
+        upper = hl_avg + state['multiplier'] * atr
+        lower = hl_avg - state['multiplier'] * atr
+        prev_upper, prev_lower = state['final_upper'], state['final_lower']
+        if prev_upper is not None and not (upper < prev_upper or prev_close > prev_upper):
+            upper = prev_upper
+        if prev_lower is not None and not (lower > prev_lower or prev_close < prev_lower):
+            lower = prev_lower
         
-        # Volume trend
-        avg_volume = hist['Volume'].rolling(window=20).mean().iloc[-1]
-        recent_volume = hist['Volume'].iloc[-5:].mean()
+        if state['direction'] == 1:
+            direction = -1 if close < lower else 1
+        else:
+            direction = 1 if close > upper else -1
+        state.update({
+            'final_upper': upper, 'final_lower': lower, 'direction': direction,
+            'supertrend': lower if direction == 1 else upper
+        })
+    
+    # SMA and volume windows
+    closes = state['closes']
+    if len(closes) >= 20:
+        state['close_sum_20'] -= closes[-20]
+    if len(closes) == closes.maxlen:
+        state['close_sum_50'] -= closes[0]
+    closes.append(close)
+    state['close_sum_20'] += close
+    state['close_sum_50'] += close
+    
+    # A missing volume counts as zero so it cannot poison the running sum
+    if not np.isfinite(volume):
+        volume = 0.0
+    volumes = state['volumes']
+    if len(volumes) == volumes.maxlen:
+        state['volume_sum_20'] -= volumes[0]
+    volumes.append(volume)
+    state['volume_sum_20'] += volume
+    
+    # 52-week high/low via monotonic windows (amortised O(1))
+    highs = state['highs_52w']
+    while highs and highs[-1][1] <= high:
+        highs.pop()
+    highs.append((bar, high))
+    while highs[0][0] <= bar - BARS_52W:
+        highs.popleft()
+    
+    lows = state['lows_52w']
+    while lows and lows[-1][1] >= low:
+        lows.pop()
+    lows.append((bar, low))
+    while lows[0][0] <= bar - BARS_52W:
+        lows.popleft()
+    
+    state.update({'bars': bar + 1, 'prev_close': close, 'last_date': date})
+    return state
+
+def indicator_state_signals(state):
+    """Technical signals (see _technical_signal_dict) from streaming state"""
+    bars = state['bars']
+    if bars < MIN_TECHNICAL_BARS:
+        return None
+    
+    current_price = state['prev_close']
+    supertrend = state['supertrend']
+    recent_volumes = list(state['volumes'])[-5:]
+    return _technical_signal_dict(
+        current_price=current_price,
+        supertrend_signal=1 if supertrend is not None and current_price > supertrend else -1,
+        supertrend_value=supertrend,
+        high_52w=state['highs_52w'][0][1],
+        low_52w=state['lows_52w'][0][1],
+        sma_20=state['close_sum_20'] / 20,
+        sma_50=state['close_sum_50'] / 50,
+        avg_volume=state['volume_sum_20'] / 20,
+        recent_volume=sum(recent_volumes) / len(recent_volumes)
+    )
+
+def build_indicator_states(prices, tickers, before, period=10, multiplier=3):
+    """Seed streaming state for many tickers from (dates x tickers) frames in one pass.
+    
+    Gives the same state as folding every bar dated before `before` through
+    update_indicator_state, but SuperTrend comes from the column-wise
+    supertrend_matrix kernel and the rolling windows are cut from the
+    right-aligned array tails. Tickers without bars are left out.
+    """
+    dates = np.asarray(prices['Close'].index.strftime('%Y-%m-%d'))
+    rows = dates < before
+    dates = dates[rows]
+    high, low, close, volume = (
+        prices[field].reindex(columns=tickers).to_numpy(dtype=float)[rows]
+        for field in ['High', 'Low', 'Close', 'Volume']
+    )
+    valid = ~np.isnan(close)
+    counts = valid.sum(axis=0)
+    last_rows = len(dates) - 1 - np.argmax(valid[::-1], axis=0)
+    high, low, close, volume = (right_align(m, valid) for m in (high, low, close, volume))
+    
+    upper, lower, line, direction = supertrend_matrix(high, low, close, period, multiplier)
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    volume = np.where(np.isfinite(volume), volume, 0.0)
+    
+    # 52-week monotonic windows: a bar stays while no later bar reaches its high (low)
+    window = min(BARS_52W, len(close))
+    highs, lows = high[len(close) - window:], low[len(close) - window:]
+    later_high = np.full_like(highs, -np.inf)
+    later_low = np.full_like(lows, np.inf)
+    if window > 1:
+        later_high[:-1] = np.fmax.accumulate(highs[::-1])[::-1][1:]
+        later_low[:-1] = np.fmin.accumulate(lows[::-1])[::-1][1:]
+    with np.errstate(invalid='ignore'):
+        keep_high = highs > later_high
+        keep_low = lows < later_low
+    
+    states = {}
+    for j, ticker in enumerate(tickers):
+        bars = int(counts[j])
+        if not bars:
+            continue
+        trs = tr[len(tr) - min(bars, period):, j].tolist()
+        closes = close[len(close) - min(bars, 50):, j].tolist()
+        volumes = volume[len(volume) - min(bars, 20):, j].tolist()
+        first_bar = bars - window
         
-        return {
-            'supertrend_signal': supertrend_data['signal'],
-            'supertrend_value': supertrend_data['supertrend'].iloc[-1] if not pd.isna(supertrend_data['supertrend'].iloc[-1]) else None,
-            'near_52w_high': is_near_52w_high(current_price, high_52w),
-            'price_vs_52w_high': (current_price / high_52w) if high_52w > 0 else 0,
-            'above_sma20': current_price > sma_20 if not pd.isna(sma_20) else False,
-            'above_sma50': current_price > sma_50 if not pd.isna(sma_50) else False,
-            'volume_surge': recent_volume > avg_volume * 1.2 if avg_volume > 0 else False,
-            'current_price': current_price
-        }
-    except Exception as e:
+        state = new_indicator_state(period, multiplier)
+        state['trs'].extend(trs)
+        state['closes'].extend(closes)
+        state['volumes'].extend(volumes)
+        state['highs_52w'].extend((first_bar + int(k), float(highs[k, j])) for k in np.flatnonzero(keep_high[:, j]))
+        state['lows_52w'].extend((first_bar + int(k), float(lows[k, j])) for k in np.flatnonzero(keep_low[:, j]))
+        state.update({
+            'last_date': str(dates[last_rows[j]]), 'bars': bars, 'prev_close': closes[-1],
+            'tr_sum': sum(trs), 'close_sum_20': sum(closes[-20:]), 'close_sum_50': sum(closes),
+            'volume_sum_20': sum(volumes)
+        })
+        if not np.isnan(direction[-1, j]):
+            state.update({
+                'final_upper': float(upper[-1, j]), 'final_lower': float(lower[-1, j]),
+                'direction': int(direction[-1, j]), 'supertrend': float(line[-1, j])
+            })
+        states[ticker] = state
+    return states
+
+def _forming_bars(prices, tickers, today):
+    """Latest bar dated today or later per ticker; it may still be forming"""
+    dates = np.asarray(prices['Close'].index.strftime('%Y-%m-%d'))
+    rows = np.flatnonzero(dates >= today)
+    if not len(rows):
+        return {}
+    values = {
+        field: prices[field].reindex(columns=tickers).to_numpy(dtype=float)[rows]
+        for field in ['High', 'Low', 'Close', 'Volume']
+    }
+    bars = {}
+    for i, row in enumerate(rows):
+        for j, ticker in enumerate(tickers):
+            if not np.isnan(values['Close'][i, j]):
+                bars[ticker] = (str(dates[row]), *(float(values[field][i, j]) for field in ['High', 'Low', 'Close', 'Volume']))
+    return bars
+
+def _state_to_json(state):
+    """Serialise streaming state (deques become lists)"""
+    return json.dumps({key: list(value) if isinstance(value, deque) else value for key, value in state.items()})
+
+def _state_from_json(payload):
+    """Restore streaming state saved by _state_to_json (None if from another format)"""
+    state = json.loads(payload)
+    if state.get('format') != STATE_FORMAT:
         return None
+    state['trs'] = deque(state['trs'], maxlen=state['period'])
+    state['closes'] = deque(state['closes'], maxlen=50)
+    state['volumes'] = deque(state['volumes'], maxlen=20)
+    state['highs_52w'] = deque(tuple(pair) for pair in state['highs_52w'])
+    state['lows_52w'] = deque(tuple(pair) for pair in state['lows_52w'])
+    return state
+
+def load_indicator_states(period=10, multiplier=3):
+    """All persisted indicator states for one parameter set, keyed by ticker"""
+    try:
+        with closing(get_store_connection()) as conn:
+            rows = conn.execute(
+                "SELECT ticker, state FROM indicator_state WHERE params = ?",
+                (f"{period}:{multiplier}",)
+            ).fetchall()
+    except sqlite3.Error:
+        return {}
+    states = {ticker: _state_from_json(payload) for ticker, payload in rows}
+    return {ticker: state for ticker, state in states.items() if state}
+
+def save_indicator_states(states):
+    """Persist indicator states keyed by ticker"""
+    if not states:
+        return
+    try:
+        with closing(get_store_connection()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO indicator_state (ticker, params, last_date, state) VALUES (?, ?, ?, ?)",
+                [
+                    (ticker, f"{state['period']}:{state['multiplier']}", state['last_date'], _state_to_json(state))
+                    for ticker, state in states.items()
+                ]
+            )
+    except sqlite3.Error:
+        pass
+
+def refresh_indicator_states(tickers, period=10, multiplier=3):
+    """Bring persisted indicator state up to date and return signals per ticker.
+    
+    Known tickers only download and fold the bars since their last update;
+    new or long-stale tickers are seeded in one batch pass over
+    STATE_BOOTSTRAP_PERIOD of price store history. Today's bar may still be
+    forming, so it is applied to a copy for the returned signals but not
+    persisted.
+    
+    Each ticker's latest finished bar date and forming bar are remembered for
+    STATE_CHECK_TTL_SECONDS. While that check is fresh and from today, a
+    state that already holds the finished bar needs no download at all.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    states = load_indicator_states(period, multiplier)
+    today = datetime.now().strftime('%Y-%m-%d')
+    cutoff = (datetime.now() - timedelta(days=STATE_MAX_CATCHUP_DAYS)).strftime('%Y-%m-%d')
+    
+    check_cache = get_state_check_cache()
+    bootstrap = []
+    catch_up = []
+    live_bars = {}
+    for ticker in tickers:
+        state = states.get(ticker)
+        if state is None or state['last_date'] is None or state['last_date'] < cutoff:
+            states[ticker] = new_indicator_state(period, multiplier)
+            bootstrap.append(ticker)
+            continue
+        found, check = check_cache.lookup(ticker)
+        if found and check['day'] == today and state['last_date'] >= check['last_finished']:
+            if check['live_bar']:
+                live_bars[ticker] = check['live_bar']
+        else:
+            catch_up.append(ticker)
+    
+    updated = {}
+    checked = []
+    if bootstrap:
+        prices = load_price_frames(bootstrap, STATE_BOOTSTRAP_PERIOD)
+        if prices:
+            seeded = build_indicator_states(prices, bootstrap, today, period, multiplier)
+            states.update(seeded)
+            updated.update(seeded)
+            live_bars.update(_forming_bars(prices, bootstrap, today))
+            checked.extend(bootstrap)
+    
+    since = min((states[ticker]['last_date'] for ticker in catch_up), default=None)
+    for start in range(0, len(catch_up), PRICE_DOWNLOAD_CHUNK):
+        chunk = catch_up[start:start + PRICE_DOWNLOAD_CHUNK]
+        prices = _download_price_frames(chunk, start=since)
+        if not prices:
+            continue
+        live_bars.update(_forming_bars(prices, chunk, today))
+        checked.extend(chunk)
+        dates = prices['Close'].index.strftime('%Y-%m-%d').tolist()
+        values = {field: prices[field].to_numpy(dtype=float) for field in ['High', 'Low', 'Close', 'Volume']}
+        for j, ticker in enumerate(chunk):
+            state = states[ticker]
+            for i, date in enumerate(dates):
+                if date <= state['last_date'] or date >= today:
+                    continue
+                update_indicator_state(state, date, *(values[field][i, j] for field in ['High', 'Low', 'Close', 'Volume']))
+                updated[ticker] = state
+    
+    save_indicator_states(updated)
+    for ticker in checked:
+        if states[ticker]['last_date'] is not None:
+            check_cache.store(ticker, {
+                'day': today, 'last_finished': states[ticker]['last_date'], 'live_bar': live_bars.get(ticker)
+            })
+    
+    signals = {}
+    for ticker in tickers:
+        state = states[ticker]
+        if ticker in live_bars:
+            state = update_indicator_state(copy.deepcopy(state), *live_bars[ticker])
+        signals[ticker] = indicator_state_signals(state)
+    return signals
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -10173,6 +10762,11 @@ def get_all_categories():
     """Get list of all categories"""
     return list(INDIAN_STOCKS.keys())
 
+@st.cache_data
+def industry_select_options():
+    """'Industry (N stocks)' labels for industry pickers, sorted by industry"""
+    return [f"{industry} ({len(get_stocks_by_category(industry))} stocks)" for industry in sorted(get_all_categories())]
+
 def search_stock(query):
     """Search for stocks by ticker or name"""
     results = {}
@@ -10206,9 +10800,162 @@ def get_sector_for_industry(industry):
 TOTAL_STOCKS = sum(len(stocks) for stocks in INDIAN_STOCKS.values())
 TOTAL_CATEGORIES = len(INDIAN_STOCKS)
 
+# ============================================================================
+# SCREEN TIMING
+# ============================================================================
+# Per-ticker screener stages, in pipeline order. Times are self times: retry
+# sleeps are not counted in fetch and provider loads are not counted in filter.
+SCREEN_TIMING_STAGES = ['fetch', 'retry_sleep', 'extract', 'fair_value', 'technicals', 'filter', 'store']
+
+# Slowest tickers kept in a run summary
+SCREEN_TIMING_SLOWEST = 5
+
+# The timings dict (and open stage stack) the current thread is recording into
+_screen_timer = threading.local()
+
+@contextmanager
+def screen_timings(timings):
+    """Record screen_stage times and note_screen_event counts from this thread into timings"""
+    previous = (getattr(_screen_timer, 'timings', None), getattr(_screen_timer, 'stack', None))
+    _screen_timer.timings, _screen_timer.stack = timings, []
+    try:
+        yield timings
+    finally:
+        _screen_timer.timings, _screen_timer.stack = previous
+
+@contextmanager
+def screen_stage(stage):
+    """Time a block as stage when this thread is recording; no-op otherwise"""
+    timings = getattr(_screen_timer, 'timings', None)
+    if timings is None:
+        yield
+        return
+    stack = _screen_timer.stack
+    parent = stack[-1] if stack else None
+    stack.append(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        timings[stage] = timings.get(stage, 0.0) + elapsed
+        if parent:
+            timings[parent] = timings.get(parent, 0.0) - elapsed
+
+def note_screen_event(event, amount=1):
+    """Count an event (cache miss, retry) when this thread is recording"""
+    timings = getattr(_screen_timer, 'timings', None)
+    if timings is not None:
+        timings[event] = timings.get(event, 0) + amount
+
+def new_screen_stats(total, processed=0, summary=None):
+    """Running timing totals for a screen run, continuing a persisted summary when resuming"""
+    summary = summary or {}
+    stages = dict.fromkeys(SCREEN_TIMING_STAGES, 0.0)
+    stages.update(summary.get('stages', {}))
+    return {
+        'total': total,
+        'processed': processed,
+        'tickers': summary.get('tickers', 0),
+        'stages': stages,
+        'cache_hits': summary.get('cache_hits', 0),
+        'cache_misses': summary.get('cache_misses', 0),
+        'retries': summary.get('retries', 0),
+        'slowest': [tuple(entry) for entry in summary.get('slowest', [])],
+        'prior_elapsed': summary.get('elapsed', 0.0),
+        'started': time.time(),
+        'run_tickers': 0
+    }
+
+def add_screen_timings(stats, update):
+    """Fold one screen update's per-ticker timings into the run totals"""
+    timings = update['timings']
+    stats['processed'] = update['processed']
+    stats['tickers'] += 1
+    stats['run_tickers'] += 1
+    for stage in SCREEN_TIMING_STAGES:
+        stats['stages'][stage] += timings.get(stage, 0.0)
+    stats['cache_misses' if timings['cache'] == 'miss' else 'cache_hits'] += 1
+    stats['retries'] += timings.get('retries', 0)
+    
+    seconds = sum(timings.get(stage, 0.0) for stage in SCREEN_TIMING_STAGES)
+    entry = (seconds, update['ticker'], {stage: timings.get(stage, 0.0) for stage in SCREEN_TIMING_STAGES})
+    if len(stats['slowest']) < SCREEN_TIMING_SLOWEST:
+        heapq.heappush(stats['slowest'], entry)
+    elif seconds > stats['slowest'][0][0]:
+        heapq.heapreplace(stats['slowest'], entry)
+
+def screen_stats_summary(stats):
+    """JSON-ready run summary: stage totals, cache/retry counts, throughput and ETA"""
+    run_elapsed = time.time() - stats['started']
+    rate = stats['run_tickers'] / run_elapsed if run_elapsed > 0 and stats['run_tickers'] else None
+    remaining = max(stats['total'] - stats['processed'], 0)
+    return {
+        'tickers': stats['tickers'],
+        'elapsed': stats['prior_elapsed'] + run_elapsed,
+        'rate': rate,
+        'eta': remaining / rate if rate else None,
+        'stages': dict(stats['stages']),
+        'cache_hits': stats['cache_hits'],
+        'cache_misses': stats['cache_misses'],
+        'retries': stats['retries'],
+        'slowest': sorted(stats['slowest'], key=lambda entry: entry[0], reverse=True)
+    }
+
+def format_duration(seconds):
+    """Seconds -> '1h 02m', '3m 05s' or '42s'"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
 # ============================================================================
 # STOCK DATA FETCHING AND CACHING
 # ============================================================================
+# Seconds fetched fundamentals are reused
+STOCK_INFO_TTL_SECONDS = 3600
+STOCK_INFO_CACHE_SIZE = 5000
+
+class TTLCache(IndicatorCache):
+    """IndicatorCache whose entries also expire ttl_seconds after being stored.
+    
+    Used instead of st.cache_data for data that background screen job
+    threads read: those threads have no script run context, and every
+    st.cache_data miss on them logs a warning.
+    """
+    
+    def __init__(self, ttl_seconds, max_entries):
+        super().__init__(max_entries)
+        self.ttl_seconds = ttl_seconds
+    
+    def lookup(self, key):
+        """Return (found, value); expired entries count as misses"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] >= self.ttl_seconds:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+    
+    def store(self, key, value):
+        """Insert or refresh an entry, stamped with the time it was stored"""
+        super().store(key, (time.time(), value))
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+@st.cache_resource
+def get_stock_info_cache():
+    """Process-wide cache of fetched stock info shared by sessions and job threads"""
+    return TTLCache(STOCK_INFO_TTL_SECONDS, STOCK_INFO_CACHE_SIZE)
+
 def retry_with_backoff(retries=3, backoff_in_seconds=2):
     def decorator(func):
         @wraps(func)
@@ -10220,15 +10967,36 @@ def retry_with_backoff(retries=3, backoff_in_seconds=2):
                 except Exception as e:
                     if x == retries:
                         raise
-                    time.sleep(backoff_in_seconds * 2 ** x)
+                    note_screen_event('retries')
+                    with screen_stage('retry_sleep'):
+                        time.sleep(backoff_in_seconds * 2 ** x)
                     x += 1
         return wrapper
     return decorator
 
-@st.cache_data(ttl=3600)
-@retry_with_backoff(retries=3, backoff_in_seconds=2)
 def fetch_stock_data(ticker):
-    """Fetch stock data with caching and retry mechanism"""
+    """Fetch stock data with caching and retry mechanism.
+    
+    Results are kept for STOCK_INFO_TTL_SECONDS in a process-wide cache that
+    works from any thread (treat them as read-only). Sessions missing the
+    cache for the same ticker at the same time share one upstream request
+    instead of each calling Yahoo Finance.
+    """
+    cache = get_stock_info_cache()
+    found, cached = cache.lookup(ticker)
+    if found:
+        return cached
+    
+    note_screen_event('cache_misses')
+    result = get_singleflight().do(('info', ticker), _fetch_stock_info, ticker)
+    # A rate-limited ticker is skipped, not cached, so the next call tries again
+    if result[1] != "Rate limit reached":
+        cache.store(ticker, result)
+    return result
+
+@retry_with_backoff(retries=3, backoff_in_seconds=2)
+def _fetch_stock_info(ticker):
+    """Upstream info request behind fetch_stock_data"""
     try:
         time.sleep(0.5)  # Rate limiting
         stock = yf.Ticker(ticker)
@@ -10244,7 +11012,8 @@ def fetch_stock_data(ticker):
 
 def get_stock_fundamentals(ticker):
     """Get key fundamental metrics for a stock with enhanced sector analysis"""
-    info, error = fetch_stock_data(ticker)
+    with screen_stage('fetch'):
+        info, error = fetch_stock_data(ticker)
     
     if error or not info:
         return None
@@ -10301,7 +11070,14 @@ def get_stock_fundamentals(ticker):
         return None
 
 def get_industry_benchmarks(industry, cap_type='Large'):
-    """Get industry-specific benchmarks with cap-size adjustments"""
+    """Get industry-specific benchmarks with cap-size adjustments.
+    
+    Values from the active calibrated benchmark set override the hand-typed
+    constants wherever the universe had enough samples. The returned dict
+    carries a 'version' key naming the set used ('static' when none).
+    """
+    calibrated = load_active_benchmark_set() if USE_CALIBRATED_BENCHMARKS else None
+    
     # Get industry-specific benchmarks first
     if industry in INDUSTRY_BENCHMARKS:
         base_benchmarks = INDUSTRY_BENCHMARKS[industry].copy()
@@ -10309,10 +11085,18 @@ def get_industry_benchmarks(industry, cap_type='Large'):
         # Fallback to sector benchmarks
         sector = get_sector_for_industry(industry)
         base_benchmarks = SECTOR_BENCHMARKS.get(sector, SECTOR_BENCHMARKS['Other']).copy()
+        if calibrated:
+            base_benchmarks.update(calibrated['sectors'].get(sector, {}))
+    
+    multipliers = CAP_SIZE_MULTIPLIERS.get(cap_type)
+    base_benchmarks['version'] = 'static'
+    if calibrated:
+        base_benchmarks.update(calibrated['industries'].get(industry, {}))
+        multipliers = calibrated['cap_multipliers'].get(cap_type, multipliers)
+        base_benchmarks['version'] = calibrated['version']
     
     # Apply cap-size multipliers
-    if cap_type in CAP_SIZE_MULTIPLIERS:
-        multipliers = CAP_SIZE_MULTIPLIERS[cap_type]
+    if multipliers:
         base_benchmarks['pe'] *= multipliers['pe']
         base_benchmarks['pb'] *= multipliers['pb'] 
         base_benchmarks['ev_ebitda'] *= multipliers['ev_ebitda']
@@ -10465,174 +11249,1864 @@ def calculate_valuations(info, industry=None):
             '52w_high': info.get('fiftyTwoWeekHigh', 0),
             '52w_low': info.get('fiftyTwoWeekLow', 0),
             'cap_type': cap_type,
-            'benchmarks_used': benchmarks
+            'benchmarks_used': benchmarks,
+            'benchmark_version': benchmarks['version']
         }
     except:
         return None
 
 # ============================================================================
-# SCREENING LOGIC
+# LOCAL FUNDAMENTALS STORE
 # ============================================================================
-def run_industry_screener(industry, strategy_type="undervalued", max_results=50):
-    """Run comprehensive screening for a specific industry using enhanced benchmarks"""
-    
-    stocks = get_stocks_by_category(industry)
-    if not stocks:
-        return pd.DataFrame()
-    
-    results = []
+DATA_DIR = os.environ.get(
+    "NYZTRADE_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+STORE_DB_PATH = os.path.join(DATA_DIR, "nyztrade.db")
+
+# Latest fundamentals per ticker, written by the screener and refresh jobs
+STORE_FUNDAMENTAL_COLUMNS = [
+    'ticker', 'name', 'category', 'sector', 'price', 'market_cap', 'cap_type',
+    'trailing_pe', 'forward_pe', 'pb_ratio', 'roe', 'profit_margin', 'debt_to_equity',
+    'dividend_yield', 'beta', 'trailing_eps', 'enterprise_value', 'ebitda',
+    'book_value', 'volume', '52w_high', '52w_low', 'pct_from_high', 'pct_from_low',
+    'fair_value', 'upside', 'benchmark_version', 'updated_at'
+]
+
+STORE_SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS fundamentals (
+    ticker TEXT PRIMARY KEY,
+    name TEXT, category TEXT, sector TEXT,
+    price REAL, market_cap REAL, cap_type TEXT,
+    trailing_pe REAL, forward_pe REAL, pb_ratio REAL, roe REAL, profit_margin REAL,
+    debt_to_equity REAL, dividend_yield REAL, beta REAL, trailing_eps REAL,
+    enterprise_value REAL, ebitda REAL, book_value REAL, volume REAL,
+    "52w_high" REAL, "52w_low" REAL, pct_from_high REAL, pct_from_low REAL,
+    fair_value REAL, upside REAL, benchmark_version TEXT, updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fundamentals_category ON fundamentals(category);
+CREATE TABLE IF NOT EXISTS benchmark_sets (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT, watermark TEXT, ticker_count INTEGER, payload TEXT
+);
+CREATE TABLE IF NOT EXISTS indicator_state (
+    ticker TEXT, params TEXT, last_date TEXT, state TEXT,
+    PRIMARY KEY (ticker, params)
+);
+CREATE TABLE IF NOT EXISTS fundamentals_history (
+    ticker TEXT, snapshot_date TEXT, category TEXT,
+    price REAL, fair_value REAL, upside REAL,
+    trailing_pe REAL, roe REAL, debt_to_equity REAL,
+    PRIMARY KEY (ticker, snapshot_date)
+);
+CREATE TABLE IF NOT EXISTS screen_jobs (
+    job_id TEXT PRIMARY KEY, industry TEXT, strategy TEXT, max_results INTEGER,
+    status TEXT, processed INTEGER, total INTEGER, found INTEGER,
+    created_at TEXT, updated_at TEXT, error TEXT
+);
+CREATE TABLE IF NOT EXISTS screen_job_results (
+    job_id TEXT, ticker TEXT, candidate TEXT,
+    PRIMARY KEY (job_id, ticker)
+);
+CREATE TABLE IF NOT EXISTS saved_screens (
+    screen_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT, industry TEXT, strategy TEXT, max_results INTEGER,
+    schedule_time TEXT, enabled INTEGER, created_at TEXT, last_run_at TEXT
+);
+CREATE TABLE IF NOT EXISTS saved_screen_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    screen_id INTEGER, job_id TEXT, run_at TEXT, status TEXT, result_count INTEGER,
+    new_entrants INTEGER, drop_outs INTEGER, upside_changes INTEGER, diff_path TEXT
+);
+"""
+
+# Daily snapshot of the valuation fields the backtester replays
+STORE_HISTORY_COLUMNS = [
+    'ticker', 'snapshot_date', 'category', 'price', 'fair_value', 'upside',
+    'trailing_pe', 'roe', 'debt_to_equity'
+]
+
+# Columns added to existing tables after their first release: (table, column, type)
+STORE_COLUMN_MIGRATIONS = [
+    ('fundamentals', 'benchmark_version', 'TEXT'),
+    ('screen_jobs', 'data_version', 'TEXT'),
+    ('screen_job_results', 'score', 'REAL'),
+    ('screen_jobs', 'result_version', 'TEXT'),
+    ('screen_jobs', 'timings', 'TEXT')
+]
+
+@st.cache_resource
+def ensure_store_schema():
+    """Create the store schema and apply column migrations once per process; returns the database path"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with closing(sqlite3.connect(STORE_DB_PATH, timeout=30)) as conn:
+        conn.executescript(STORE_SCHEMA)
+        for table, column, column_type in STORE_COLUMN_MIGRATIONS:
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {column_type}')
+    return STORE_DB_PATH
+
+def get_store_connection():
+    """Open the local SQLite store (the schema is set up on first use per process)"""
+    return sqlite3.connect(ensure_store_schema(), timeout=30, check_same_thread=False)
+
+def build_store_row(fundamentals, category, fair_value=None):
+    """Flatten fundamentals plus screener fair value into a store row"""
+    price = fundamentals.get('price')
+    upside = ((fair_value - price) / price) * 100 if fair_value and price else None
+    row = {col: fundamentals.get(col) for col in STORE_FUNDAMENTAL_COLUMNS}
+    row.update({
+        'category': category,
+        'sector': get_sector_for_industry(category),
+        'fair_value': fair_value,
+        'upside': upside,
+        'benchmark_version': str(get_industry_benchmarks(category)['version']),
+        'updated_at': datetime.now().isoformat(timespec='seconds')
+    })
+    return row
+
+def store_fundamentals(rows):
+    """Upsert fundamentals rows into the local store"""
+    if not rows:
+        return
+    columns = ', '.join(f'"{col}"' for col in STORE_FUNDAMENTAL_COLUMNS)
+    placeholders = ', '.join('?' for _ in STORE_FUNDAMENTAL_COLUMNS)
+    values = [tuple(row.get(col) for col in STORE_FUNDAMENTAL_COLUMNS) for row in rows]
     
-    # Progress tracking
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    total_stocks = len(stocks)
+    # One snapshot per ticker per day; later runs the same day replace it
+    history_columns = ', '.join(STORE_HISTORY_COLUMNS)
+    history_placeholders = ', '.join('?' for _ in STORE_HISTORY_COLUMNS)
+    history_values = [
+        tuple(row['updated_at'][:10] if col == 'snapshot_date' else row.get(col) for col in STORE_HISTORY_COLUMNS)
+        for row in rows
+    ]
+    try:
+        with closing(get_store_connection()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO fundamentals ({columns}) VALUES ({placeholders})",
+                values
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO fundamentals_history ({history_columns}) VALUES ({history_placeholders})",
+                history_values
+            )
+    except sqlite3.Error:
+        pass
+
+def load_fundamentals_table(category=None):
+    """Load stored fundamentals as a DataFrame, optionally for one industry"""
+    query = "SELECT * FROM fundamentals"
+    params = ()
+    if category:
+        query += " WHERE category = ?"
+        params = (category,)
+    try:
+        with closing(get_store_connection()) as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=STORE_FUNDAMENTAL_COLUMNS + ['ev_ebitda'])
     
-    for i, (ticker, name) in enumerate(stocks.items()):
-        # Update progress
-        progress = (i + 1) / total_stocks
-        progress_bar.progress(progress)
-        status_text.text(f"Processing {ticker} ({i + 1}/{total_stocks})")
-        
-        # Get fundamentals
+    # Derived multiples used by relative valuation
+    ebitda = df['ebitda'].where(df['ebitda'] > 0)
+    df['ev_ebitda'] = df['enterprise_value'] / ebitda
+    return df
+
+def load_fundamentals_history(tickers=None):
+    """Load stored fundamentals snapshots, optionally for a set of tickers"""
+    try:
+        with closing(get_store_connection()) as conn:
+            df = pd.read_sql_query("SELECT * FROM fundamentals_history", conn)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=STORE_HISTORY_COLUMNS)
+    if tickers is not None:
+        df = df[df['ticker'].isin(list(tickers))]
+    return df
+
+def refresh_industry_fundamentals(industry, progress_callback=None):
+    """Fetch and store fundamentals for every ticker in an industry"""
+    stocks = get_stocks_by_category(industry)
+    rows = []
+    for i, ticker in enumerate(stocks):
+        if progress_callback:
+            progress_callback(i + 1, len(stocks), ticker)
         fundamentals = get_stock_fundamentals(ticker)
         if not fundamentals or not fundamentals['price']:
             continue
-        
-        # Calculate fair value using industry-specific benchmarks
         fair_value = calculate_fair_value(fundamentals, industry, fundamentals.get('cap_type', 'Large'))
-        if not fair_value or fair_value <= 0:
-            continue
-        
-        # Calculate upside
-        upside = ((fair_value - fundamentals['price']) / fundamentals['price']) * 100
-        
-        # Remove outliers: Skip stocks with upside > 500% (likely data errors)
-        if upside > 350:
-            continue
-        
-        # Get industry benchmarks for additional filtering
-        benchmarks = get_industry_benchmarks(industry, fundamentals.get('cap_type', 'Large'))
-        
-        # Apply strategy filters with enhanced criteria
-        passes_filter = False
-        
-        if strategy_type == "undervalued":
-            # Basic undervalued filter
-            if upside >= 15:  # At least 15% upside
-                passes_filter = True
-        
-        elif strategy_type == "undervalued_near_high":
-            # Undervalued stocks trading near 52-week highs (strong momentum + value)
-            if upside >= 15:  # Must be undervalued
-                pct_from_high = fundamentals.get('pct_from_high', -100)
-                # Near 52-week high: within 5% of high
-                if pct_from_high >= -5:
-                    passes_filter = True
-        
-        elif strategy_type == "undervalued_supertrend":
-            # Undervalued + Real SuperTrend bullish signal
-            if upside >= 15:  # Must be undervalued
-                # Get technical signals
-                with st.spinner(f"Analyzing technical signals for {ticker}..."):
-                    technical = get_technical_signals(ticker)
-                
-                if technical:
-                    # SuperTrend bullish (1) and additional confirmations
-                    if (technical['supertrend_signal'] == 1 and
-                        technical['above_sma20'] and 
-                        technical.get('price_vs_52w_high', 0) > 0.7):  # Not in deep correction
-                        passes_filter = True
-        
-        elif strategy_type == "undervalued_rsi_macd":
-            # Undervalued + momentum indicators (proxy using price action)
-            if (upside >= 15 and
-                fundamentals.get('pct_from_high', -100) >= -30 and
-                fundamentals.get('volume', 0) > 0):  # Has volume
-                passes_filter = True
-        
-        elif strategy_type == "momentum":
-            # Momentum: stocks near 52W high with reasonable valuation
-            if (fundamentals.get('pct_from_high', -100) >= -10 and
-                fundamentals.get('trailing_pe', 999) <= benchmarks['pe'] * 1.5):
-                passes_filter = True
-        
-        elif strategy_type == "quality":
-            # Quality: good fundamentals with reasonable valuation
-            roe_threshold = benchmarks.get('roe', 15) / 100
-            if (fundamentals.get('roe', 0) > roe_threshold and
-                fundamentals.get('trailing_pe', 999) <= benchmarks['pe'] * 1.2 and
-                upside >= 5 and
-                fundamentals.get('debt_to_equity', 999) <= benchmarks.get('debt_equity', 1.0)):
-                passes_filter = True
-        
-        if not passes_filter:
-            continue
-        
-        # Add to results
-        result = {
-            'Ticker': ticker,
-            'Name': name,
-            'Industry': industry,
-            'Price': fundamentals['price'],
-            'Fair Value': fair_value,
-            'Upside %': upside,
-            'PE Ratio': fundamentals['trailing_pe'],
-            'PB Ratio': fundamentals['pb_ratio'],
-            'ROE %': fundamentals['roe'] * 100 if fundamentals['roe'] else None,
-            'Market Cap': fundamentals['market_cap'],
-            'Cap Type': fundamentals['cap_type'],
-            'From 52W High %': fundamentals['pct_from_high'],
-            'From 52W Low %': fundamentals['pct_from_low'],
-            'Beta': fundamentals['beta'],
-            'Dividend Yield %': fundamentals['dividend_yield'] * 100 if fundamentals['dividend_yield'] else None,
-            'Industry PE Benchmark': benchmarks['pe'],
-            'Industry EV/EBITDA Benchmark': benchmarks['ev_ebitda']
-        }
-        results.append(result)
-        
-        if len(results) >= max_results:
-            break
+        rows.append(build_store_row(fundamentals, industry, fair_value))
+    store_fundamentals(rows)
+    maybe_recalibrate_benchmarks()
+    return len(rows)
+
+# ============================================================================
+# MEMORY-MAPPED PRICE STORE
+# ============================================================================
+# Columnar on-disk history: one float32 (dates x tickers) matrix per field,
+# stored column-major so each ticker's series is contiguous, plus a shared
+# trading calendar. Readers map the files read-only, so any number of
+# processes share the same pages and resident memory does not grow with
+# the universe.
+#
+# Each write publishes a new immutable version directory and then switches
+# the CURRENT pointer file with one os.replace, so readers always see either
+# the old or the new version complete. The previous version is kept for
+# readers that resolved the pointer just before the switch.
+PRICE_STORE_DIR = os.path.join(DATA_DIR, "prices")
+PRICE_STORE_POINTER = 'CURRENT'
+PRICE_STORE_LOCK_FILE = '.lock'
+PRICE_FIELDS = ['High', 'Low', 'Close', 'Volume']
+
+# Tickers refreshed longer ago than this are downloaded again
+PRICE_STORE_TTL_SECONDS = 3600
+
+def _current_price_store_version():
+    """Version directory named by the store's pointer file, or None"""
+    try:
+        with open(os.path.join(PRICE_STORE_DIR, PRICE_STORE_POINTER)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+@st.cache_resource(max_entries=2)
+def _map_price_store(version):
+    """Read-only memory maps for one published version of the store"""
+    path = os.path.join(PRICE_STORE_DIR, version)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if not meta['tickers']:
+        return None
     
-    # Clear progress indicators
-    progress_bar.empty()
-    status_text.empty()
+    shape = (meta['dates'], len(meta['tickers']))
+    store = {
+        'version': version,
+        'calendar': pd.DatetimeIndex(np.load(os.path.join(path, 'calendar.npy'))),
+        'tickers': meta['tickers'],
+        'columns': {ticker: j for j, ticker in enumerate(meta['tickers'])},
+        'refreshed': meta['refreshed']
+    }
+    for field in PRICE_FIELDS:
+        store[field] = np.memmap(
+            os.path.join(path, f'{field}.f32'),
+            dtype=np.float32, mode='r', shape=shape, order='F'
+        )
+    return store
+
+def open_price_store():
+    """Currently published price store (memory-mapped), or None"""
+    version = _current_price_store_version()
+    if not version:
+        return None
+    try:
+        return _map_price_store(version)
+    except (OSError, ValueError, KeyError):
+        return None
+
+@contextmanager
+def _price_store_lock():
+    """Exclusive writer lock shared by every process using the store"""
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    with open(os.path.join(PRICE_STORE_DIR, PRICE_STORE_LOCK_FILE), 'a') as f:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _prune_price_store(keep):
+    """Remove versions (and leftovers of failed writes) other than keep"""
+    for name in os.listdir(PRICE_STORE_DIR):
+        if name in keep or name in (PRICE_STORE_POINTER, PRICE_STORE_LOCK_FILE):
+            continue
+        path = os.path.join(PRICE_STORE_DIR, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def stale_price_store_tickers(tickers):
+    """Tickers missing from the store or refreshed more than PRICE_STORE_TTL_SECONDS ago"""
+    store = open_price_store()
+    if not store:
+        return list(tickers)
+    cutoff = (datetime.now() - timedelta(seconds=PRICE_STORE_TTL_SECONDS)).isoformat(timespec='seconds')
+    return [ticker for ticker in tickers if store['refreshed'].get(ticker, '') < cutoff]
+
+def read_price_store(tickers):
+    """(dates x tickers) frames for the requested tickers (NaN columns for unknown ones)"""
+    store = open_price_store()
+    if not store:
+        return None
     
-    return pd.DataFrame(results)
+    known = [ticker for ticker in tickers if ticker in store['columns']]
+    columns = [store['columns'][ticker] for ticker in known]
+    return {
+        field: pd.DataFrame(store[field][:, columns], index=store['calendar'], columns=known).reindex(columns=tickers)
+        for field in PRICE_FIELDS
+    }
 
-def search_stocks_by_name(query, max_results=50):
-    """Search stocks by company name across all industries"""
-    results = []
-    query_lower = query.lower()
+def _write_price_store_version(path, frames, current):
+    """Write the merged matrices, calendar and metadata into a new version directory"""
+    new_tickers = list(frames['Close'].columns)
+    new_dates = pd.DatetimeIndex(frames['Close'].index)
+    if new_dates.tz is not None:
+        new_dates = new_dates.tz_localize(None)
+    new_dates = new_dates.normalize()
     
-    for industry, stocks in INDIAN_STOCKS.items():
-        for ticker, name in stocks.items():
-            if query_lower in name.lower() or query_lower in ticker.lower():
-                results.append({
-                    'ticker': ticker,
-                    'name': name,
-                    'industry': industry
-                })
-                if len(results) >= max_results:
-                    break
-        if len(results) >= max_results:
-            break
+    replaced = set(new_tickers)
+    kept = [ticker for ticker in current['tickers'] if ticker not in replaced] if current else []
+    calendar = new_dates.union(current['calendar']) if current else new_dates.unique().sort_values()
+    calendar = calendar[calendar >= calendar[-1] - HISTORY_LOOKBACK_OFFSET]
+    tickers = kept + new_tickers
     
-    return results
+    os.makedirs(path)
+    shape = (len(calendar), len(tickers))
+    for field in PRICE_FIELDS:
+        out = np.memmap(os.path.join(path, f'{field}.f32'), dtype=np.float32, mode='w+', shape=shape, order='F')
+        out[:] = np.nan
+        if kept:
+            old_rows = calendar.get_indexer(current['calendar'])
+            in_window = old_rows >= 0
+            old_columns = [current['columns'][ticker] for ticker in kept]
+            out[np.ix_(old_rows[in_window], np.arange(len(kept)))] = current[field][in_window][:, old_columns]
+        new_rows = calendar.get_indexer(new_dates)
+        in_window = new_rows >= 0
+        values = frames[field].to_numpy(dtype=np.float32)[in_window]
+        out[np.ix_(new_rows[in_window], np.arange(len(kept), len(tickers)))] = values
+        out.flush()
+        del out
+    
+    np.save(os.path.join(path, 'calendar.npy'), calendar.to_numpy(dtype='datetime64[ns]'))
+    refreshed = {ticker: current['refreshed'][ticker] for ticker in kept} if current else {}
+    now = datetime.now().isoformat(timespec='seconds')
+    refreshed.update({ticker: now for ticker in new_tickers})
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'dates': len(calendar), 'tickers': tickers, 'refreshed': refreshed}, f)
+
+def write_price_store(frames):
+    """Merge downloaded (dates x tickers) frames into the store and publish a new version.
+    
+    The version directory is complete before the pointer switches to it, so
+    readers never see a half-written matrix; existing maps keep their files.
+    """
+    with _price_store_lock():
+        previous = _current_price_store_version()
+        current = open_price_store()
+        version = f"v{time.time_ns()}"
+        path = os.path.join(PRICE_STORE_DIR, version)
+        pointer_tmp = os.path.join(PRICE_STORE_DIR, f"{PRICE_STORE_POINTER}.tmp")
+        try:
+            _write_price_store_version(path, frames, current)
+            with open(pointer_tmp, 'w') as f:
+                f.write(version)
+            os.replace(pointer_tmp, os.path.join(PRICE_STORE_DIR, PRICE_STORE_POINTER))
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        _prune_price_store({version, previous})
 
 # ============================================================================
-# CHART GENERATION FUNCTIONS
+# BENCHMARK RECALIBRATION
 # ============================================================================
-def create_gauge_chart(upside_pe, upside_ev):
-    """Create professional dual gauge chart for valuations"""
-    fig = make_subplots(
-        rows=1, cols=2,
-        specs=[[{'type': 'indicator'}, {'type': 'indicator'}]],
-        horizontal_spacing=0.15
-    )
+# Use the latest calibrated benchmark set (when one exists) instead of the constants
+USE_CALIBRATED_BENCHMARKS = True
+
+# Benchmark key -> (store column, lower bound, upper bound) in benchmark units
+BENCHMARK_METRICS = {
+    'pe': ('trailing_pe', 0, 100),
+    'pb': ('pb_ratio', 0, 20),
+    'roe': ('roe', -50, 100),
+    'ev_ebitda': ('ev_ebitda', 0, 50),
+    'debt_equity': ('debt_to_equity', 0, 10)
+}
+
+# Benchmark value x scale = store value: yfinance reports ROE as a fraction
+# and D/E as a percentage, benchmarks use percent ROE and plain D/E ratios
+BENCHMARK_STORE_SCALE = {'roe': 0.01, 'debt_equity': 100}
+
+# Multiples adjusted by CAP_SIZE_MULTIPLIERS
+CAP_SCALED_METRICS = ['pe', 'pb', 'ev_ebitda']
+
+# Minimum stocks behind a calibrated value before it replaces the constant
+MIN_BENCHMARK_SAMPLES = 8
+
+# Automatic recalibration runs at most this often
+BENCHMARK_RECALIBRATION_HOURS = 24
+
+def _clean_benchmark_metrics(df):
+    """Store columns in benchmark units, with out-of-range values dropped"""
+    clean = pd.DataFrame(index=df.index)
+    for key, (column, low, high) in BENCHMARK_METRICS.items():
+        values = pd.to_numeric(df[column], errors='coerce') / BENCHMARK_STORE_SCALE.get(key, 1)
+        clean[key] = values.where((values > low) & (values < high))
+    return clean
+
+def _group_benchmarks(values, keys):
+    """Per-group medians of well-sampled metrics, plus the stock count per group"""
+    stats = values.groupby(keys).agg(['median', 'count'])
+    medians = stats.xs('median', axis=1, level=1)
+    counts = stats.xs('count', axis=1, level=1)
+    medians = medians.where(counts >= MIN_BENCHMARK_SAMPLES).round(2)
     
-    # PE Multiple Gauge
-    fig.add_trace(go.Indicator(
-        mode="gauge+number+delta",
+    benchmarks = {}
+    for group, row in medians.iterrows():
+        group_values = {metric: float(value) for metric, value in row.items() if pd.notna(value)}
+        if group_values:
+            benchmarks[group] = group_values
+    return benchmarks, {group: int(n) for group, n in counts.max(axis=1).items()}
+
+def compute_benchmark_set(df):
+    """Robust industry, sector and cap-size benchmarks from stored fundamentals.
+    
+    Cap multipliers are the median ratio of each stock's multiple to its
+    industry median, normalised so Large = 1. Industry and sector medians are
+    then taken over Large-equivalent multiples, matching how
+    get_industry_benchmarks applies multipliers on top of a Large base.
+    """
+    clean = _clean_benchmark_metrics(df)
+    caps = df['cap_type']
+    
+    industry_medians = clean[CAP_SCALED_METRICS].groupby(df['category']).transform('median')
+    relative = clean[CAP_SCALED_METRICS] / industry_medians
+    cap_stats = relative.groupby(caps).agg(['median', 'count'])
+    
+    cap_multipliers = {cap_type: dict(multipliers) for cap_type, multipliers in CAP_SIZE_MULTIPLIERS.items()}
+    if 'Large' in cap_stats.index:
+        for metric in CAP_SCALED_METRICS:
+            large_ratio = cap_stats.loc['Large', (metric, 'median')]
+            if cap_stats.loc['Large', (metric, 'count')] < MIN_BENCHMARK_SAMPLES or not large_ratio > 0:
+                continue
+            for cap_type in cap_multipliers:
+                if cap_type in cap_stats.index and cap_stats.loc[cap_type, (metric, 'count')] >= MIN_BENCHMARK_SAMPLES:
+                    cap_multipliers[cap_type][metric] = round(float(cap_stats.loc[cap_type, (metric, 'median')] / large_ratio), 3)
+    
+    # Convert every stock's multiples to their Large-cap equivalent
+    base = clean.copy()
+    for metric in CAP_SCALED_METRICS:
+        divisor = caps.map({cap_type: m[metric] for cap_type, m in cap_multipliers.items()})
+        base[metric] = clean[metric] / divisor.fillna(1.0)
+    
+    industries, industry_counts = _group_benchmarks(base, df['category'])
+    sectors, sector_counts = _group_benchmarks(base, df['sector'])
+    
+    return {
+        'industries': industries,
+        'sectors': sectors,
+        'cap_multipliers': cap_multipliers,
+        'industry_counts': industry_counts,
+        'sector_counts': sector_counts
+    }
+
+def _load_latest_benchmark_set():
+    """Latest saved benchmark set from the store, or None"""
+    try:
+        with closing(get_store_connection()) as conn:
+            row = conn.execute(
+                "SELECT version, created_at, watermark, ticker_count, payload "
+                "FROM benchmark_sets ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if not row:
+        return None
+    benchmark_set = json.loads(row[4])
+    benchmark_set.update({'version': row[0], 'created_at': row[1], 'watermark': row[2], 'ticker_count': row[3]})
+    return benchmark_set
+
+# Seconds the active benchmark set is reused before the store is read again
+BENCHMARK_SET_TTL_SECONDS = 300
+
+@st.cache_resource
+def get_benchmark_set_cache():
+    """Process-wide cache for the active benchmark set (read from job threads too)"""
+    return TTLCache(BENCHMARK_SET_TTL_SECONDS, 1)
+
+def load_active_benchmark_set():
+    """Cached active benchmark set used by get_industry_benchmarks"""
+    cache = get_benchmark_set_cache()
+    found, benchmark_set = cache.lookup('active')
+    if not found:
+        benchmark_set = _load_latest_benchmark_set()
+        cache.store('active', benchmark_set)
+    return benchmark_set
+
+def recalibrate_benchmarks(force=False):
+    """Recompute benchmarks from the whole store and version the result.
+    
+    Skips work when no ticker was refreshed since the last set's watermark
+    (unless forced) and only saves a new version when the values changed.
+    Returns the active set.
+    """
+    previous = _load_latest_benchmark_set()
+    df = load_fundamentals_table()
+    if df.empty:
+        return previous
+    
+    watermark = df['updated_at'].max()
+    if previous and not force and watermark <= previous['watermark']:
+        return previous
+    
+    computed = compute_benchmark_set(df)
+    payload = json.dumps(computed, sort_keys=True)
+    if previous:
+        previous_payload = json.dumps({key: previous[key] for key in computed}, sort_keys=True)
+        if payload == previous_payload:
+            return previous
+    
+    try:
+        with closing(get_store_connection()) as conn, conn:
+            conn.execute(
+                "INSERT INTO benchmark_sets (created_at, watermark, ticker_count, payload) VALUES (?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec='seconds'), watermark, len(df), payload)
+            )
+    except sqlite3.Error:
+        return previous
+    
+    get_benchmark_set_cache().clear()
+    return _load_latest_benchmark_set()
+
+def maybe_recalibrate_benchmarks():
+    """Recalibrate after store updates once the active set is older than the interval"""
+    active = _load_latest_benchmark_set()
+    if active:
+        age = datetime.now() - datetime.fromisoformat(active['created_at'])
+        if age < timedelta(hours=BENCHMARK_RECALIBRATION_HOURS):
+            return active
+    return recalibrate_benchmarks()
+
+# ============================================================================
+# RELATIVE VALUATION
+# ============================================================================
+# Metrics ranked against industry and sector peers (rank key -> store column)
+RELATIVE_RANK_METRICS = {
+    'pe': 'trailing_pe',
+    'pb': 'pb_ratio',
+    'ev_ebitda': 'ev_ebitda',
+    'roe': 'roe',
+    'margin': 'profit_margin',
+    'upside': 'upside'
+}
+
+# Valuation multiples are only comparable when positive; lower is cheaper
+RELATIVE_MULTIPLE_METRICS = ['pe', 'pb', 'ev_ebitda']
+
+# Peer groups used for ranking (level -> store column)
+RELATIVE_RANK_LEVELS = {'industry': 'category', 'sector': 'sector'}
+
+def compute_relative_ranks(df):
+    """Add percentile ranks of each metric within industry and sector peers.
+    
+    Ranks are ascending in [0, 1]: 0 is the lowest value in the peer group
+    and 1 the highest. Groups with a single valid value get NaN.
+    """
+    if df.empty:
+        return df.copy()
+    
+    values = pd.DataFrame(
+        {key: pd.to_numeric(df[col], errors='coerce') for key, col in RELATIVE_RANK_METRICS.items()},
+        index=df.index
+    )
+    multiples = values[RELATIVE_MULTIPLE_METRICS]
+    values[RELATIVE_MULTIPLE_METRICS] = multiples.where(multiples > 0)
+    
+    ranked = [df]
+    for level, group_col in RELATIVE_RANK_LEVELS.items():
+        grouped = values.groupby(df[group_col])
+        position = grouped.rank(method='min') - 1
+        peers = grouped.transform('count') - 1
+        pct = position / peers.where(peers > 0)
+        ranked.append(pct.add_suffix(f'_{level}_pct'))
+    return pd.concat(ranked, axis=1)
+
+def screen_relative_decile(ranked, metric='pe', level='industry', deciles=1):
+    """Stocks in the most attractive decile(s) of their peer group for a metric.
+    
+    For valuation multiples this is the cheapest end of the distribution,
+    for ROE, margin and upside the highest.
+    """
+    column = f'{metric}_{level}_pct'
+    if ranked.empty or column not in ranked.columns:
+        return ranked.iloc[0:0]
+    
+    pct = ranked[column]
+    cutoff = deciles / 10
+    if metric in RELATIVE_MULTIPLE_METRICS:
+        mask = pct <= cutoff
+    else:
+        mask = pct >= 1 - cutoff
+    return ranked[mask].sort_values(column, ascending=metric in RELATIVE_MULTIPLE_METRICS)
+
+def relative_valuation_table(picks, metric='pe', label='P/E', level='industry'):
+    """Display columns for relative valuation picks.
+    
+    The ranked metric column can coincide with a fixed column (Upside), so
+    duplicates are dropped before selecting.
+    """
+    metric_column = RELATIVE_RANK_METRICS[metric]
+    pct_column = f'{metric}_{level}_pct'
+    columns = list(dict.fromkeys([
+        'ticker', 'name', 'category', 'sector', 'price', 'upside',
+        metric_column, pct_column, 'updated_at'
+    ]))
+    return picks[columns].rename(columns={
+        'ticker': 'Ticker', 'name': 'Name', 'category': 'Industry', 'sector': 'Sector',
+        'price': 'Price', 'upside': 'Upside %', metric_column: label,
+        pct_column: 'Peer Percentile', 'updated_at': 'Updated'
+    })
+
+# ============================================================================
+# CUSTOM SCREEN QUERIES
+# ============================================================================
+# Short names accepted in queries (query name -> store column)
+QUERY_FIELD_ALIASES = {
+    'industry': 'category',
+    'pe': 'trailing_pe',
+    'pb': 'pb_ratio',
+    'debt_equity': 'debt_to_equity',
+    'high_52w': '52w_high',
+    'low_52w': '52w_low'
+}
+
+# Peer groups usable as prefixes, e.g. industry.roe is the industry median ROE
+QUERY_PEER_LEVELS = {'industry': 'category', 'sector': 'sector'}
+
+QUERY_EXAMPLE = "upside >= 20 and roe > industry.roe and pct_from_high > -10 and cap_type in ('Mid', 'Small')"
+
+QUERY_COMPARE_OPS = {
+    ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Eq: operator.eq, ast.NotEq: operator.ne
+}
+QUERY_ARITH_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub,
+    ast.Mult: operator.mul, ast.Div: operator.truediv
+}
+
+def _query_column(df, name):
+    """Store column for a query field name"""
+    column = QUERY_FIELD_ALIASES.get(name, name)
+    if column not in df.columns:
+        raise ValueError(f"Unknown field '{name}'")
+    return column
+
+def _peer_values(df, level, name):
+    """Median of a field across each row's peers; benchmark.* reads the industry benchmark in store units"""
+    if level == 'benchmark':
+        pairs = df[['category', 'cap_type']].drop_duplicates()
+        lookup = {
+            (category, cap_type): get_industry_benchmarks(category, cap_type).get(name, np.nan)
+            for category, cap_type in pairs.itertuples(index=False)
+        }
+        scale = BENCHMARK_STORE_SCALE.get(name, 1)
+        lookup = {
+            key: value * scale if isinstance(value, (int, float)) else np.nan
+            for key, value in lookup.items()
+        }
+        if all(pd.isna(value) for value in lookup.values()):
+            raise ValueError(f"Unknown benchmark '{name}'")
+        keys = pd.MultiIndex.from_frame(df[['category', 'cap_type']])
+        return pd.Series(keys.map(lookup), index=df.index, dtype=float)
+    column = _query_column(df, name)
+    return df.groupby(QUERY_PEER_LEVELS[level])[column].transform('median')
+
+def _query_constants(node):
+    """Literal values on the right of 'in'"""
+    if not isinstance(node, (ast.Tuple, ast.List, ast.Set)) or not all(
+            isinstance(element, ast.Constant) for element in node.elts):
+        raise ValueError("'in' needs a list of values, e.g. cap_type in ('Mid', 'Small')")
+    return [element.value for element in node.elts]
+
+def _compile_query_node(node):
+    """Turn one syntax node into a function of the fundamentals frame"""
+    if isinstance(node, ast.Expression):
+        return _compile_query_node(node.body)
+    
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_query_node(value) for value in node.values]
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+        return lambda df: functools.reduce(combine, (part(df) for part in parts))
+    
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile_query_node(node.operand)
+        if isinstance(node.op, ast.Not):
+            return lambda df: ~operand(df)
+        return lambda df: -operand(df)
+    
+    if isinstance(node, ast.Compare):
+        left = _compile_query_node(node.left)
+        left_node = node.left
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if isinstance(left_node, ast.Constant):
+                    raise ValueError("'in' needs a field on its left, e.g. cap_type in ('Mid', 'Small')")
+                steps.append((op, _query_constants(comparator)))
+            elif type(op) in QUERY_COMPARE_OPS:
+                steps.append((op, _compile_query_node(comparator)))
+                left_node = comparator
+            else:
+                raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+        
+        def compare(df):
+            current = left(df)
+            mask = None
+            for op, right in steps:
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    result = current.isin(right)
+                    if isinstance(op, ast.NotIn):
+                        result = ~result
+                else:
+                    value = right(df)
+                    result = QUERY_COMPARE_OPS[type(op)](current, value)
+                    current = value
+                mask = result if mask is None else mask & result
+            return mask
+        return compare
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in QUERY_ARITH_OPS:
+        left = _compile_query_node(node.left)
+        right = _compile_query_node(node.right)
+        arith = QUERY_ARITH_OPS[type(node.op)]
+        return lambda df: arith(left(df), right(df))
+    
+    if isinstance(node, ast.Attribute):
+        if not isinstance(node.value, ast.Name) or node.value.id not in {*QUERY_PEER_LEVELS, 'benchmark'}:
+            raise ValueError("Prefixes must be industry., sector. or benchmark.")
+        level, name = node.value.id, node.attr
+        return lambda df: _peer_values(df, level, name)
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda df: df[_query_column(df, name)]
+    
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+        value = node.value
+        return lambda df: value
+    
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+@functools.lru_cache(maxsize=256)
+def compile_screen_query(expression):
+    """Parse a screen expression once into a function: fundamentals frame -> boolean mask.
+    
+    Supports and/or/not, comparisons (including chained and in/not in),
+    + - * /, numbers and strings, store fields (plus QUERY_FIELD_ALIASES)
+    and industry./sector. peer medians or benchmark. values. Raises
+    ValueError for anything else.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid query: {e.msg}")
+    return _compile_query_node(tree)
+
+def run_screen_query(expression, category=None):
+    """Stored fundamentals matching a screen expression"""
+    df = load_fundamentals_table(category)
+    try:
+        mask = compile_screen_query(expression)(df)
+    except TypeError as e:
+        raise ValueError(f"Type mismatch in query: {e}")
+    except ZeroDivisionError:
+        raise ValueError("Division by zero in query")
+    except AttributeError as e:
+        raise ValueError(f"Cannot evaluate query: {e}")
+    if not isinstance(mask, pd.Series) or mask.dtype != bool:
+        raise ValueError("Query must be a condition, e.g. upside >= 20")
+    return df[mask]
+
+# ============================================================================
+# STRATEGY BACKTEST
+# ============================================================================
+# Strategies the backtester can replay (keys match SCREEN_STRATEGIES)
+BACKTEST_STRATEGIES = ['undervalued', 'undervalued_near_high', 'undervalued_supertrend']
+
+# Bars between rebalances (~1 month) and default price history to replay
+BACKTEST_REBALANCE_BARS = 21
+BACKTEST_HISTORY_PERIOD = "2y"
+
+def fair_value_matrix(history, dates, tickers, backfill=False):
+    """As-of fair value for every (date, ticker) from stored snapshots.
+    
+    A snapshot becomes usable from the session after it was taken, so a
+    rebalance never sees a fair value computed from that day's close.
+    With backfill, dates before a ticker's first snapshot reuse it, which
+    makes short histories testable at the cost of look-ahead bias.
+    """
+    history = history.dropna(subset=['fair_value'])
+    history = history[history['fair_value'] > 0]
+    if history.empty:
+        return pd.DataFrame(np.nan, index=dates, columns=tickers)
+    
+    snapshots = history.pivot_table(
+        index='snapshot_date', columns='ticker', values='fair_value', aggfunc='last'
+    )
+    snapshots.index = pd.to_datetime(snapshots.index) + pd.Timedelta(days=1)
+    snapshots = snapshots.reindex(columns=tickers)
+    
+    calendar = pd.DatetimeIndex(dates).tz_localize(None)
+    combined = snapshots.reindex(snapshots.index.union(calendar)).ffill()
+    if backfill:
+        combined = combined.bfill()
+    return pd.DataFrame(combined.reindex(calendar).to_numpy(), index=dates, columns=tickers)
+
+def _supertrend_direction(high, low, close, period=10, multiplier=3):
+    """SuperTrend direction on calendar-aligned arrays, computed per ticker's own bars"""
+    valid = ~np.isnan(close)
+    order = np.argsort(valid, axis=0, kind='stable')
+    aligned = [np.take_along_axis(m, order, axis=0) for m in (high, low, close)]
+    _, _, _, direction = supertrend_matrix(*aligned, period, multiplier)
+    
+    result = np.empty_like(direction)
+    np.put_along_axis(result, order, direction, axis=0)
+    return np.where(valid, result, np.nan)
+
+def backtest_candidate_frame(high, low, close, fair_value, technical=False):
+    """Candidate frame with one row per (date, ticker) cell, row-major.
+    
+    Holds the columns the screen filters read, rebuilt at every bar from
+    price history and the as-of fair value; with technical, also the
+    columns of the 'technical' provider.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        high_52w = pd.DataFrame(high).rolling(BARS_52W, min_periods=1).max().to_numpy()
+        price_vs_high = close / high_52w
+        columns = {
+            'fair_value': fair_value,
+            'upside': (fair_value - close) / close * 100,
+            'pct_from_high': (price_vs_high - 1) * 100
+        }
+        if technical:
+            sma_20 = pd.DataFrame(close).rolling(20).mean().to_numpy()
+            columns.update({
+                'supertrend_signal': _supertrend_direction(high, low, close),
+                'above_sma20': close > sma_20,
+                'price_vs_52w_high': price_vs_high
+            })
+    return pd.DataFrame({name: values.ravel() for name, values in columns.items()})
+
+def strategy_masks(high, low, close, fair_value, strategies=BACKTEST_STRATEGIES):
+    """Boolean (dates x tickers) selection mask per strategy.
+    
+    Evaluates the same filters as the screener (strategy_filters) over a
+    candidate frame rebuilt at every bar by backtest_candidate_frame.
+    """
+    filters = {strategy: strategy_filters(strategy) for strategy in strategies}
+    technical = any(screen['provider'] == 'technical' for screens in filters.values() for screen in screens)
+    candidates = backtest_candidate_frame(high, low, close, fair_value, technical)
+    
+    masks = {}
+    for strategy, screens in filters.items():
+        mask = np.ones(len(candidates), dtype=bool)
+        for screen in screens:
+            mask &= screen['mask'](candidates).fillna(False).to_numpy(dtype=bool)
+        masks[strategy] = mask.reshape(close.shape)
+    return masks
+
+def backtest_masks(close, masks, rebalance_bars=BACKTEST_REBALANCE_BARS, start_bar=MIN_TECHNICAL_BARS):
+    """Equal-weight rebalanced portfolios for each strategy mask.
+    
+    At every rebalance bar the selected tickers are held until the next
+    rebalance; periods with no selection sit in cash. Returns a summary
+    DataFrame (one row per strategy plus the equal-weight universe) and an
+    equity curve per strategy indexed by rebalance position.
+    """
+    n_bars = close.shape[0]
+    starts = np.arange(min(start_bar, n_bars - 1), n_bars - 1, rebalance_bars)
+    if len(starts) == 0:
+        return pd.DataFrame(), pd.DataFrame()
+    ends = np.minimum(starts + rebalance_bars, n_bars - 1)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forward = close[ends] / close[starts] - 1
+    tradable = ~np.isnan(forward)
+    
+    def summarize(name, held):
+        picks = held.sum(axis=1)
+        with np.errstate(invalid='ignore'):
+            period_returns = np.where(picks > 0, np.where(held, forward, 0).sum(axis=1) / np.maximum(picks, 1), 0.0)
+        equity = np.cumprod(1 + period_returns)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        hits = (held & (forward > 0)).sum()
+        total_picks = held.sum()
+        row = {
+            'Strategy': name,
+            'Rebalances': len(starts),
+            'Avg Holdings': picks.mean(),
+            'Invested %': (picks > 0).mean() * 100,
+            'Hit Rate %': hits / total_picks * 100 if total_picks else None,
+            'Avg Period Return %': period_returns[picks > 0].mean() * 100 if (picks > 0).any() else None,
+            'Total Return %': (equity[-1] - 1) * 100,
+            'Max Drawdown %': drawdown.min() * 100
+        }
+        return row, np.concatenate([[1.0], equity])
+    
+    rows = []
+    curves = {}
+    for name, mask in masks.items():
+        row, curves[name] = summarize(name, mask[starts] & tradable)
+        rows.append(row)
+    row, curves['universe'] = summarize('universe', tradable)
+    rows.append(row)
+    
+    return pd.DataFrame(rows), pd.DataFrame(curves, index=np.concatenate([starts, [ends[-1]]]))
+
+def run_strategy_backtest(tickers, strategies=BACKTEST_STRATEGIES, history_period=BACKTEST_HISTORY_PERIOD,
+                          rebalance_bars=BACKTEST_REBALANCE_BARS, backfill=False):
+    """Replay stored fundamentals snapshots and price history for a ticker universe"""
+    history = load_fundamentals_history(tickers)
+    if history.empty:
+        return None
+    
+    covered = sorted(history['ticker'].unique())
+    fields = load_price_frames(covered, history_period)
+    if not fields:
+        return None
+    
+    close = fields['Close']
+    dates = close.index
+    fair_value = fair_value_matrix(history, dates, list(close.columns), backfill)
+    
+    masks = strategy_masks(
+        fields['High'].to_numpy(dtype=float),
+        fields['Low'].to_numpy(dtype=float),
+        close.to_numpy(dtype=float),
+        fair_value.to_numpy(dtype=float),
+        strategies
+    )
+    summary, equity = backtest_masks(close.to_numpy(dtype=float), masks, rebalance_bars)
+    if not equity.empty:
+        equity.index = dates[equity.index]
+    
+    return {
+        'summary': summary,
+        'equity': equity,
+        'tickers': len(covered),
+        'snapshots': len(history),
+        'first_snapshot': history['snapshot_date'].min()
+    }
+
+# ============================================================================
+# SCREENING PIPELINE
+# ============================================================================
+# Filter cost classes, cheapest first:
+#   fundamental - columns already on the candidate frame (vectorized, free)
+#   history     - needs price history, loaded in bulk for the survivors
+#   network     - needs per-ticker upstream calls for the survivors
+SCREEN_COST_ORDER = {'fundamental': 0, 'history': 1, 'network': 2}
+
+def _technical_columns(tickers):
+    """SuperTrend/SMA columns for the survivors from persisted streaming state"""
+    signals = refresh_indicator_states(tickers)
+    return pd.DataFrame([
+        {
+            'ticker': ticker,
+            'supertrend_signal': signal['supertrend_signal'] if signal else np.nan,
+            'above_sma20': signal['above_sma20'] if signal else False,
+            'price_vs_52w_high': signal.get('price_vs_52w_high', 0) if signal else np.nan
+        }
+        for ticker, signal in signals.items()
+    ])
+
+def _momentum_columns(tickers):
+    """RSI/MACD columns for the survivors from one batch pass"""
+    signals = get_momentum_signals_batch(tickers)
+    return pd.DataFrame([
+        {
+            'ticker': ticker,
+            'rsi': signal['rsi'] if signal else np.nan,
+            'macd_bullish': signal['macd_bullish'] if signal else False
+        }
+        for ticker, signal in signals.items()
+    ])
+
+# Column providers for filters that need more than the candidate frame
+SCREEN_PROVIDERS = {
+    'technical': {'cost': 'history', 'load': _technical_columns},
+    'momentum': {'cost': 'history', 'load': _momentum_columns}
+}
+
+def screen_filter(name, mask, provider=None):
+    """Declare a screen filter: mask(df) -> boolean Series over the candidate frame"""
+    cost = SCREEN_PROVIDERS[provider]['cost'] if provider else 'fundamental'
+    return {'name': name, 'mask': mask, 'provider': provider, 'cost': cost}
+
+UPSIDE_15 = screen_filter('Upside >= 15%', lambda df: df['upside'] >= 15)
+
+# Applied to every strategy: a usable fair value and no data-error outliers
+SCREEN_BASE_FILTERS = [
+    screen_filter('Fair value available', lambda df: df['fair_value'] > 0),
+    screen_filter('Upside <= 350%', lambda df: df['upside'] <= 350)
+]
+
+# Strategy -> filter list; order here does not matter, the planner orders by cost
+SCREEN_STRATEGIES = {
+    'undervalued': [UPSIDE_15],
+    'undervalued_near_high': [
+        UPSIDE_15,
+        screen_filter('Within 5% of 52W high', lambda df: df['pct_from_high'] >= -5)
+    ],
+    'undervalued_supertrend': [
+        screen_filter('SuperTrend bullish', lambda df: df['supertrend_signal'] == 1, 'technical'),
+        screen_filter('Above SMA 20', lambda df: df['above_sma20'] == True, 'technical'),
+        screen_filter('Above 70% of 52W high', lambda df: df['price_vs_52w_high'] > 0.7, 'technical'),
+        UPSIDE_15
+    ],
+    'undervalued_rsi_macd': [
+        screen_filter(
+            'RSI in momentum range',
+            lambda df: df['rsi'].between(*RSI_MOMENTUM_RANGE),
+            'momentum'
+        ),
+        screen_filter('MACD above signal', lambda df: df['macd_bullish'] == True, 'momentum'),
+        UPSIDE_15
+    ],
+    'momentum': [
+        screen_filter('Within 10% of 52W high', lambda df: df['pct_from_high'] >= -10),
+        screen_filter('PE <= 1.5x benchmark', lambda df: df['trailing_pe'] <= df['bench_pe'] * 1.5)
+    ],
+    'quality': [
+        screen_filter('ROE above benchmark', lambda df: df['roe'] > df['bench_roe'] / 100),
+        screen_filter('PE <= 1.2x benchmark', lambda df: df['trailing_pe'] <= df['bench_pe'] * 1.2),
+        screen_filter('Upside >= 5%', lambda df: df['upside'] >= 5),
+        screen_filter('D/E within benchmark', lambda df: df['debt_to_equity'] <= df['bench_debt_equity'])
+    ]
+}
+
+# Candidate column a strategy ranks by when keeping its best results (default: upside)
+SCREEN_STRATEGY_SCORES = {
+    'momentum': 'pct_from_high'
+}
+
+def strategy_score_column(strategy_type):
+    """Column used to rank a strategy's qualifying stocks, higher is better"""
+    return SCREEN_STRATEGY_SCORES.get(strategy_type, 'upside')
+
+def push_top_k(heap, k, score, seq, row):
+    """Keep the k best rows in a min-heap of (score, -seq, row); earlier rows win ties"""
+    score = score if pd.notna(score) else float('-inf')
+    entry = (score, -seq, row)
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+
+def plan_screen_filters(filters):
+    """Order filters cheapest cost class first, grouping each provider's filters together"""
+    first_seen = {}
+    for position, screen in enumerate(filters):
+        first_seen.setdefault(screen['provider'], position)
+    return sorted(
+        filters,
+        key=lambda screen: (SCREEN_COST_ORDER[screen['cost']], first_seen[screen['provider']])
+    )
+
+def apply_screen_filters(candidates, filters):
+    """Evaluate planned filters as vectorized masks, loading provider columns only for survivors"""
+    loaded = set()
+    for screen in plan_screen_filters(filters):
+        if candidates.empty:
+            break
+        provider = screen['provider']
+        if provider and provider not in loaded:
+            with screen_stage('technicals'):
+                columns = SCREEN_PROVIDERS[provider]['load'](list(candidates['ticker']))
+            candidates = candidates.merge(columns, on='ticker', how='left')
+            loaded.add(provider)
+        mask = screen['mask'](candidates).fillna(False).astype(bool)
+        candidates = candidates[mask.to_numpy()]
+    return candidates
+
+def strategy_filters(strategy_type):
+    """Base filters plus the strategy's own filters"""
+    return SCREEN_BASE_FILTERS + SCREEN_STRATEGIES.get(strategy_type, [])
+
+def build_screen_candidate(ticker, name, industry, fundamentals, fair_value):
+    """One candidate-frame row: fundamentals, valuation and benchmark context"""
+    price = fundamentals['price']
+    benchmarks = get_industry_benchmarks(industry, fundamentals.get('cap_type', 'Large'))
+    return {
+        'ticker': ticker,
+        'name': name,
+        'industry': industry,
+        'price': price,
+        'fair_value': fair_value,
+        'upside': ((fair_value - price) / price) * 100 if fair_value else None,
+        'trailing_pe': fundamentals.get('trailing_pe'),
+        'pb_ratio': fundamentals.get('pb_ratio'),
+        'roe': fundamentals.get('roe'),
+        'debt_to_equity': fundamentals.get('debt_to_equity'),
+        'market_cap': fundamentals.get('market_cap'),
+        'cap_type': fundamentals.get('cap_type'),
+        'pct_from_high': fundamentals.get('pct_from_high'),
+        'pct_from_low': fundamentals.get('pct_from_low'),
+        'beta': fundamentals.get('beta'),
+        'dividend_yield': fundamentals.get('dividend_yield'),
+        'bench_pe': benchmarks['pe'],
+        'bench_ev_ebitda': benchmarks['ev_ebitda'],
+        'bench_roe': benchmarks.get('roe', 15),
+        'bench_debt_equity': benchmarks.get('debt_equity', 1.0),
+        'benchmark_version': benchmarks['version']
+    }
+
+# Candidate-frame columns holding text; everything else is numeric
+SCREEN_TEXT_COLUMNS = ['ticker', 'name', 'industry', 'cap_type', 'benchmark_version']
+
+def screen_candidate_frame(rows):
+    """Candidate rows -> DataFrame with numeric columns coerced so masks never see None"""
+    df = pd.DataFrame(rows)
+    for column in df.columns.difference(SCREEN_TEXT_COLUMNS):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+def format_screen_results(candidates):
+    """Candidate frame -> screener results table"""
+    if candidates.empty:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        'Ticker': candidates['ticker'],
+        'Name': candidates['name'],
+        'Industry': candidates['industry'],
+        'Price': candidates['price'],
+        'Fair Value': candidates['fair_value'],
+        'Upside %': candidates['upside'],
+        'PE Ratio': candidates['trailing_pe'],
+        'PB Ratio': candidates['pb_ratio'],
+        'ROE %': candidates['roe'] * 100,
+        'Market Cap': candidates['market_cap'],
+        'Cap Type': candidates['cap_type'],
+        'From 52W High %': candidates['pct_from_high'],
+        'From 52W Low %': candidates['pct_from_low'],
+        'Beta': candidates['beta'],
+        'Dividend Yield %': candidates['dividend_yield'] * 100,
+        'Industry PE Benchmark': candidates['bench_pe'],
+        'Industry EV/EBITDA Benchmark': candidates['bench_ev_ebitda'],
+        'Benchmark Set': candidates['benchmark_version']
+    }).reset_index(drop=True)
+
+_PRICE_COLUMN = st.column_config.NumberColumn(format="₹%,.2f")
+_PERCENT_COLUMN = st.column_config.NumberColumn(format="%+.1f%%")
+_RATIO_COLUMN = st.column_config.NumberColumn(format="%.2f")
+
+# Display formats for result tables; the data stays numeric so columns sort as numbers
+SCREEN_COLUMN_CONFIG = {
+    'Price': _PRICE_COLUMN,
+    'Fair Value': _PRICE_COLUMN,
+    'Upside %': _PERCENT_COLUMN,
+    'ROE %': _PERCENT_COLUMN,
+    'From 52W High %': _PERCENT_COLUMN,
+    'From 52W Low %': _PERCENT_COLUMN,
+    'Dividend Yield %': _PERCENT_COLUMN,
+    'Median Upside %': _PERCENT_COLUMN,
+    'Best Upside %': _PERCENT_COLUMN,
+    'PE Ratio': _RATIO_COLUMN,
+    'PB Ratio': _RATIO_COLUMN,
+    'Beta': _RATIO_COLUMN,
+    'Industry PE Benchmark': _RATIO_COLUMN,
+    'Industry EV/EBITDA Benchmark': _RATIO_COLUMN,
+    'Market Cap': st.column_config.NumberColumn("Market Cap (Cr)", format="₹%,.0f Cr")
+}
+
+def screen_display_frame(results, columns):
+    """Results columns for display, with Market Cap in crores to match SCREEN_COLUMN_CONFIG"""
+    display_df = results[columns]
+    if 'Market Cap' in columns:
+        display_df = display_df.assign(**{'Market Cap': display_df['Market Cap'] / 1e7})
+    return display_df
+
+# ============================================================================
+# SCREENING LOGIC
+# ============================================================================
+# Streaming flush: the first ticker is filtered at once, later batches grow
+# (doubling) so history providers get bulk calls, capped by a time limit
+# so slow fetches still stream
+SCREEN_FLUSH_MAX = 64
+SCREEN_FLUSH_SECONDS = 2.0
+
+# Screens do not stop once max_results stocks qualify: results are the best
+# max_results by strategy score (push_top_k), which takes every ticker being
+# scored, and the first N found would just be the first N in list order.
+# The full scan stays affordable because fundamentals are cached for an hour
+# (only misses pay the upstream rate-limit sleep), identical in-flight scans
+# are shared, and finished jobs are reused until the data changes.
+
+def iter_industry_screen(industry, strategy_type="undervalued", start=0):
+    """Stream a screen: yields one update per processed ticker.
+    
+    Each update is a dict with processed/total counts, the ticker just
+    fetched and 'passed', a candidate frame of newly qualifying stocks
+    (empty between flushes). 'settled' is True when every processed ticker
+    has been through the filters, which makes 'processed' a safe resume
+    point for start. 'timings' holds the ticker's seconds per
+    SCREEN_TIMING_STAGES stage (a flush is charged to the ticker that
+    triggered it), 'cache' ('hit' or 'miss') and any 'retries'. Fetched fundamentals are persisted in batches and
+    once more when the generator closes, so stopping early loses nothing
+    already downloaded.
+    """
+    stocks = get_stocks_by_category(industry)
+    filters = strategy_filters(strategy_type)
+    flush_size = 1
+    
+    pending = []
+    store_rows = []
+    last_flush = time.time()
+    total = len(stocks)
+    
+    try:
+        for i, (ticker, name) in enumerate(stocks.items()):
+            if i < start:
+                continue
+            with screen_timings({}) as timings:
+                with screen_stage('extract'):
+                    fundamentals = get_stock_fundamentals(ticker)
+                if fundamentals and fundamentals['price']:
+                    # Calculate fair value using industry-specific benchmarks
+                    with screen_stage('fair_value'):
+                        fair_value = calculate_fair_value(fundamentals, industry, fundamentals.get('cap_type', 'Large'))
+                        store_rows.append(build_store_row(fundamentals, industry, fair_value))
+                        pending.append(build_screen_candidate(ticker, name, industry, fundamentals, fair_value))
+                
+                passed = pd.DataFrame()
+                last_ticker = i + 1 == total
+                if pending and (len(pending) >= flush_size or last_ticker or
+                                time.time() - last_flush >= SCREEN_FLUSH_SECONDS):
+                    with screen_stage('filter'):
+                        passed = apply_screen_filters(screen_candidate_frame(pending), filters)
+                    pending = []
+                    last_flush = time.time()
+                    flush_size = min(flush_size * 2, SCREEN_FLUSH_MAX)
+                
+                if len(store_rows) >= SCREEN_FLUSH_MAX:
+                    with screen_stage('store'):
+                        store_fundamentals(store_rows)
+                    store_rows = []
+            timings['cache'] = 'miss' if timings.pop('cache_misses', 0) else 'hit'
+            
+            yield {
+                'processed': i + 1, 'total': total, 'ticker': ticker,
+                'passed': passed, 'settled': not pending, 'timings': timings
+            }
+    finally:
+        # Also runs when the consumer stops early
+        store_fundamentals(store_rows)
+        maybe_recalibrate_benchmarks()
+
+def search_stocks_by_name(query, max_results=50):
+    """Search stocks by company name across all industries"""
+    results = []
+    query_lower = query.lower()
+    
+    for industry, stocks in INDIAN_STOCKS.items():
+        for ticker, name in stocks.items():
+            if query_lower in name.lower() or query_lower in ticker.lower():
+                results.append({
+                    'ticker': ticker,
+                    'name': name,
+                    'industry': industry
+                })
+                if len(results) >= max_results:
+                    break
+        if len(results) >= max_results:
+            break
+    
+    return results
+
+# ============================================================================
+# SCREENER JOBS
+# ============================================================================
+# Checkpoint at least this often (in tickers) even when nothing new qualified
+SCREEN_CHECKPOINT_EVERY = 25
+
+# Seconds between UI refreshes while a job is running
+SCREEN_JOB_POLL_SECONDS = 2
+
+# Jobs screening at the same time; more wait their turn (bounds upstream load)
+SCREEN_JOB_CONCURRENCY = 4
+
+# Finished screens are reused this long while their input data is unchanged
+SCREEN_RESULT_TTL_SECONDS = 3600
+
+# Stored fundamentals that feed screen results (fingerprinted for reuse)
+SCREEN_RESULT_INPUTS = [
+    'ticker', 'price', 'fair_value', 'market_cap', 'trailing_pe', 'pb_ratio',
+    'roe', 'debt_to_equity', 'dividend_yield', 'beta', 'pct_from_high', 'pct_from_low'
+]
+
+@st.cache_resource
+def get_screen_job_registry():
+    """Process-wide background screen threads, live progress and stop requests.
+    
+    'active' holds the jobs whose thread has a slot; the other live threads
+    are queued behind SCREEN_JOB_CONCURRENCY.
+    """
+    return {
+        'lock': threading.RLock(), 'slots': threading.BoundedSemaphore(SCREEN_JOB_CONCURRENCY),
+        'threads': {}, 'keys': {}, 'progress': {}, 'stop': set(), 'active': set()
+    }
+
+def screen_data_version(industry):
+    """Version of the data a screen depends on (the industry's benchmark set)"""
+    return str(get_industry_benchmarks(industry)['version'])
+
+def screen_result_version(industry):
+    """Benchmark version plus a fingerprint of the industry's stored fundamentals"""
+    columns = ', '.join(SCREEN_RESULT_INPUTS)
+    try:
+        with closing(get_store_connection()) as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM fundamentals WHERE category = ? ORDER BY ticker", (industry,)
+            ).fetchall()
+    except sqlite3.Error:
+        rows = []
+    fingerprint = hashlib.sha1(repr(rows).encode()).hexdigest()[:16]
+    return f"{screen_data_version(industry)}:{fingerprint}"
+
+def find_cached_screen_job(industry, strategy_type="undervalued", max_results=50):
+    """Most recent finished job for the same screen whose inputs have not changed since"""
+    cutoff = (datetime.now() - timedelta(seconds=SCREEN_RESULT_TTL_SECONDS)).isoformat(timespec='seconds')
+    try:
+        with closing(get_store_connection()) as conn:
+            row = conn.execute(
+                "SELECT job_id FROM screen_jobs WHERE industry = ? AND strategy = ? AND max_results = ? "
+                "AND status = 'done' AND result_version = ? AND updated_at >= ? "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (industry, strategy_type, max_results, screen_result_version(industry), cutoff)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def _screen_job_key(job):
+    """Identity used to coalesce identical screens"""
+    return (job['industry'], job['strategy'], job['max_results'], job['data_version'])
+
+def create_screen_job(industry, strategy_type="undervalued", max_results=50):
+    """Register a new screener job and return its ID"""
+    job_id = uuid.uuid4().hex[:12]
+    now = datetime.now().isoformat(timespec='seconds')
+    with closing(get_store_connection()) as conn, conn:
+        conn.execute(
+            "INSERT INTO screen_jobs (job_id, industry, strategy, max_results, status, processed, total, "
+            "found, created_at, updated_at, data_version) VALUES (?, ?, ?, ?, 'queued', 0, ?, 0, ?, ?, ?)",
+            (job_id, industry, strategy_type, max_results, len(get_stocks_by_category(industry)), now, now,
+             screen_data_version(industry))
+        )
+    return job_id
+
+def get_screen_job(job_id):
+    """Stored job row as a dict, or None"""
+    try:
+        with closing(get_store_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM screen_jobs WHERE job_id = ?", (job_id,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return dict(row) if row else None
+
+def list_screen_jobs(limit=20):
+    """Most recent jobs first"""
+    try:
+        with closing(get_store_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM screen_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [dict(row) for row in rows]
+
+def _update_screen_job(job_id, **fields):
+    """Set columns on a job row and touch updated_at"""
+    fields['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    with closing(get_store_connection()) as conn, conn:
+        conn.execute(f"UPDATE screen_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+def _checkpoint_screen_job(job, processed, passed, found, timings):
+    """Persist newly qualifying candidates, the resume point and run timings in one transaction.
+    
+    Stored results are trimmed to the job's best max_results by score, so
+    the table stays O(K) however many stocks qualify.
+    """
+    job_id = job['job_id']
+    score_column = strategy_score_column(job['strategy'])
+    records = passed.to_dict('records') if not passed.empty else []
+    now = datetime.now().isoformat(timespec='seconds')
+    with closing(get_store_connection()) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO screen_job_results (job_id, ticker, candidate, score) VALUES (?, ?, ?, ?)",
+            [
+                (job_id, record['ticker'], json.dumps(record, default=str),
+                 record[score_column] if pd.notna(record[score_column]) else None)
+                for record in records
+            ]
+        )
+        if records:
+            conn.execute(
+                "DELETE FROM screen_job_results WHERE job_id = ? AND rowid NOT IN ("
+                "SELECT rowid FROM screen_job_results WHERE job_id = ? ORDER BY score DESC, rowid LIMIT ?)",
+                (job_id, job_id, job['max_results'])
+            )
+        conn.execute(
+            "UPDATE screen_jobs SET processed = ?, found = ?, timings = ?, updated_at = ? WHERE job_id = ?",
+            (processed, found, json.dumps(timings), now, job_id)
+        )
+
+def load_screen_job_results(job_id, max_results=None):
+    """Results table for a job, best score first"""
+    query = "SELECT candidate FROM screen_job_results WHERE job_id = ? ORDER BY score DESC, rowid"
+    params = (job_id,)
+    if max_results:
+        query += " LIMIT ?"
+        params = (job_id, max_results)
+    try:
+        with closing(get_store_connection()) as conn:
+            rows = conn.execute(query, params).fetchall()
+    except sqlite3.Error:
+        return pd.DataFrame()
+    if not rows:
+        return pd.DataFrame()
+    return format_screen_results(screen_candidate_frame([json.loads(row[0]) for row in rows]))
+
+def run_screen_job(job_id, progress_callback=None, should_stop=None):
+    """Run or resume a job from its last checkpoint; returns the final status.
+    
+    UI-agnostic: progress_callback receives each screen update and the
+    run's timing stats (see new_screen_stats), and should_stop is polled
+    between tickers. The timing summary is persisted with every checkpoint
+    and carried over when a job resumes.
+    """
+    job = get_screen_job(job_id)
+    if not job:
+        return None
+    
+    _update_screen_job(job_id, status='running', error=None)
+    found = job['found']
+    since_checkpoint = 0
+    status = 'done'
+    stats = new_screen_stats(
+        job['total'], job['processed'], json.loads(job['timings']) if job['timings'] else None
+    )
+    screen = iter_industry_screen(job['industry'], job['strategy'], start=job['processed'])
+    try:
+        for update in screen:
+            add_screen_timings(stats, update)
+            if progress_callback:
+                progress_callback(update, stats)
+            found += len(update['passed'])
+            since_checkpoint += 1
+            
+            # Only settled positions are safe to resume from
+            if update['settled'] and (not update['passed'].empty or
+                                      since_checkpoint >= SCREEN_CHECKPOINT_EVERY):
+                _checkpoint_screen_job(
+                    job, update['processed'], update['passed'], found, screen_stats_summary(stats)
+                )
+                since_checkpoint = 0
+            
+            if should_stop and should_stop():
+                status = 'stopped'
+                break
+        else:
+            _checkpoint_screen_job(job, job['total'], pd.DataFrame(), found, screen_stats_summary(stats))
+    except Exception as e:
+        _update_screen_job(
+            job_id, status='failed', error=str(e), timings=json.dumps(screen_stats_summary(stats))
+        )
+        return 'failed'
+    finally:
+        screen.close()
+    
+    # Finished results stay reusable until the industry's inputs change
+    result_version = screen_result_version(job['industry']) if status == 'done' else None
+    _update_screen_job(
+        job_id, status=status, result_version=result_version, timings=json.dumps(screen_stats_summary(stats))
+    )
+    return status
+
+def _screen_job_worker(job_id):
+    """Background thread body: run the job, reporting into the registry"""
+    registry = get_screen_job_registry()
+    try:
+        with registry['slots']:
+            with registry['lock']:
+                registry['active'].add(job_id)
+            if job_id in registry['stop']:
+                _update_screen_job(job_id, status='stopped')
+                return
+            run_screen_job(
+                job_id,
+                progress_callback=lambda update, stats: registry['progress'].__setitem__(job_id, stats),
+                should_stop=lambda: job_id in registry['stop']
+            )
+    finally:
+        with registry['lock']:
+            registry['threads'].pop(job_id, None)
+            registry['keys'].pop(job_id, None)
+            registry['progress'].pop(job_id, None)
+            registry['stop'].discard(job_id)
+            registry['active'].discard(job_id)
+
+def launch_screen_job(job_id):
+    """Start (or resume) a job in a background thread unless it is already running"""
+    registry = get_screen_job_registry()
+    with registry['lock']:
+        thread = registry['threads'].get(job_id)
+        if thread and thread.is_alive():
+            return
+        job = get_screen_job(job_id)
+        if not job:
+            return
+        if job['status'] != 'queued':
+            # Resumed jobs wait for a slot like new ones
+            _update_screen_job(job_id, status='queued', error=None)
+        thread = threading.Thread(target=_screen_job_worker, args=(job_id,), name=f"screen-{job_id}", daemon=True)
+        registry['threads'][job_id] = thread
+        registry['keys'][job_id] = _screen_job_key(job)
+        thread.start()
+
+def start_screen_job(industry, strategy_type="undervalued", max_results=50, use_cache=True):
+    """Run a screen in the background, reusing or joining an identical one.
+    
+    With use_cache, a finished job for the same screen whose inputs are
+    unchanged (see find_cached_screen_job) is returned as is. Otherwise
+    sessions asking for the same (industry, strategy, max results, data
+    version) while a job runs get that job's ID, so concurrent users share
+    one scan instead of each fetching the whole industry.
+    """
+    if use_cache:
+        cached_job_id = find_cached_screen_job(industry, strategy_type, max_results)
+        if cached_job_id:
+            return cached_job_id
+    
+    key = (industry, strategy_type, max_results, screen_data_version(industry))
+    registry = get_screen_job_registry()
+    with registry['lock']:
+        for job_id, job_key in registry['keys'].items():
+            if job_key == key and job_id not in registry['stop'] and is_screen_job_running(job_id):
+                return job_id
+        job_id = create_screen_job(industry, strategy_type, max_results)
+        launch_screen_job(job_id)
+    return job_id
+
+@st.cache_data(max_entries=64)
+def load_screen_job_snapshot(job_id, max_results, checkpoint):
+    """Results table (by upside) and CSV for a job as of a checkpoint.
+    
+    checkpoint is (processed, found, status): every write that changes the
+    stored results changes at least one of them, unlike updated_at, which
+    has one-second resolution and can repeat across the last checkpoint
+    and the final status update.
+    """
+    results = load_screen_job_results(job_id, max_results)
+    if not results.empty:
+        results = results.sort_values('Upside %', ascending=False)
+    return {'results': results, 'csv': results.to_csv(index=False) if not results.empty else ''}
+
+def is_screen_job_running(job_id):
+    """True while a thread in this process owns the job, running or queued for a slot"""
+    thread = get_screen_job_registry()['threads'].get(job_id)
+    return bool(thread and thread.is_alive())
+
+def screen_job_status(job_id, job):
+    """Live status: 'running' while the job holds a slot, 'queued' while its thread waits for one"""
+    if job_id in get_screen_job_registry()['active']:
+        return 'running'
+    if is_screen_job_running(job_id):
+        return 'queued'
+    return job['status']
+
+def join_screen_job(job_id):
+    """Block until this process's thread for the job (if any) has finished"""
+    thread = get_screen_job_registry()['threads'].get(job_id)
+    if thread:
+        thread.join()
+
+def stop_screen_job(job_id):
+    """Ask a running job to stop after its current ticker"""
+    registry = get_screen_job_registry()
+    with registry['lock']:
+        if job_id in registry['threads']:
+            registry['stop'].add(job_id)
+
+def screen_job_progress(job_id, job):
+    """Live processed count when running here, else the last checkpoint"""
+    stats = get_screen_job_registry()['progress'].get(job_id)
+    return stats['processed'] if stats else job['processed']
+
+def screen_job_timing(job_id, job):
+    """Live timing summary when running here, else the persisted one (None before any ticker)"""
+    stats = get_screen_job_registry()['progress'].get(job_id)
+    if stats:
+        return screen_stats_summary(stats)
+    return json.loads(job['timings']) if job.get('timings') else None
+
+# ============================================================================
+# SECTOR SCREENING
+# ============================================================================
+def get_sector_industries(sector):
+    """Industries (with stocks) that roll up into a sector"""
+    return sorted(
+        industry for industry in get_all_categories()
+        if get_sector_for_industry(industry) == sector
+    )
+
+def get_all_sectors():
+    """Sectors that have at least one industry with stocks"""
+    return sorted({get_sector_for_industry(industry) for industry in get_all_categories()})
+
+def start_sector_screen(sector, strategy_type="undervalued", max_results=50, use_cache=True):
+    """Fan a sector out into one background job per industry; returns {industry: job_id}.
+    
+    Jobs run in parallel up to SCREEN_JOB_CONCURRENCY. Industries with a
+    reusable finished screen or an identical one already running share it,
+    so overlapping sector and industry screens share work.
+    """
+    return {
+        industry: start_screen_job(industry, strategy_type, max_results, use_cache)
+        for industry in get_sector_industries(sector)
+    }
+
+def load_sector_screen(job_ids):
+    """Merged results plus a per-industry summary for a sector screen"""
+    frames = []
+    summary_rows = []
+    for industry, job_id in job_ids.items():
+        job = get_screen_job(job_id)
+        if not job:
+            continue
+        results = load_screen_job_results(job_id, job['max_results'])
+        if not results.empty:
+            frames.append(results)
+        timing = screen_job_timing(job_id, job)
+        summary_rows.append({
+            'Industry': industry,
+            'Status': screen_job_status(job_id, job),
+            'Screened': screen_job_progress(job_id, job),
+            'Universe': job['total'],
+            'Stocks/s': timing['rate'] if timing else None,
+            'Qualifying': job['found'],
+            'Median Upside %': results['Upside %'].median() if not results.empty else None,
+            'Best Upside %': results['Upside %'].max() if not results.empty else None,
+            'Industry PE Benchmark': get_industry_benchmarks(industry)['pe']
+        })
+    
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not merged.empty:
+        merged = merged.sort_values('Upside %', ascending=False, ignore_index=True)
+    return merged, pd.DataFrame(summary_rows)
+
+# ============================================================================
+# SCHEDULED SCREENS
+# ============================================================================
+# Diff files written after each scheduled run
+SCREEN_ALERTS_DIR = os.path.join(DATA_DIR, "alerts")
+
+# Upside moves (in percentage points) reported between runs
+SCREEN_ALERT_UPSIDE_CHANGE = 5.0
+
+# Seconds between scheduler checks for due screens
+SCREEN_SCHEDULER_INTERVAL = 60
+
+# Name of the scheduler thread; at most one runs per process
+SCREEN_SCHEDULER_THREAD = "screen-scheduler"
+
+def save_screen(name, industry, strategy_type, max_results, schedule_time):
+    """Add a saved screen that runs daily at schedule_time ('HH:MM', server time)"""
+    with closing(get_store_connection()) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO saved_screens (name, industry, strategy, max_results, schedule_time, enabled, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 1, ?)",
+            (name, industry, strategy_type, max_results, schedule_time, datetime.now().isoformat(timespec='seconds'))
+        )
+    return cursor.lastrowid
+
+def list_saved_screens():
+    """All saved screens as dicts"""
+    try:
+        with closing(get_store_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM saved_screens ORDER BY schedule_time, name").fetchall()
+    except sqlite3.Error:
+        return []
+    return [dict(row) for row in rows]
+
+def update_saved_screen(screen_id, **fields):
+    """Set columns on a saved screen"""
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    with closing(get_store_connection()) as conn, conn:
+        conn.execute(f"UPDATE saved_screens SET {assignments} WHERE screen_id = ?", (*fields.values(), screen_id))
+
+def delete_saved_screen(screen_id):
+    """Remove a saved screen and its run history"""
+    with closing(get_store_connection()) as conn, conn:
+        conn.execute("DELETE FROM saved_screen_runs WHERE screen_id = ?", (screen_id,))
+        conn.execute("DELETE FROM saved_screens WHERE screen_id = ?", (screen_id,))
+
+def list_saved_screen_runs(screen_id, limit=30):
+    """Run history for a saved screen, newest first"""
+    try:
+        with closing(get_store_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM saved_screen_runs WHERE screen_id = ? ORDER BY run_id DESC LIMIT ?",
+                (screen_id, limit)
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [dict(row) for row in rows]
+
+def diff_screen_results(previous, current, threshold=SCREEN_ALERT_UPSIDE_CHANGE):
+    """New entrants, drop-outs and upside moves beyond threshold between two result tables"""
+    columns = ['Change', 'Ticker', 'Name', 'Previous Upside %', 'Current Upside %', 'Upside Change']
+    key_columns = ['Ticker', 'Name', 'Upside %']
+    previous = previous[key_columns] if not previous.empty else pd.DataFrame(columns=key_columns)
+    current = current[key_columns] if not current.empty else pd.DataFrame(columns=key_columns)
+    
+    merged = previous.merge(current, on='Ticker', how='outer', suffixes=(' prev', ' curr'), indicator=True)
+    merged['Name'] = merged['Name curr'].fillna(merged['Name prev'])
+    merged['Previous Upside %'] = merged['Upside % prev'].astype(float)
+    merged['Current Upside %'] = merged['Upside % curr'].astype(float)
+    merged['Upside Change'] = merged['Current Upside %'] - merged['Previous Upside %']
+    merged['Change'] = np.select(
+        [merged['_merge'] == 'right_only', merged['_merge'] == 'left_only'],
+        ['New entrant', 'Drop-out'],
+        'Upside change'
+    )
+    moved = (merged['_merge'] == 'both') & (merged['Upside Change'].abs() >= threshold)
+    diff = merged[(merged['_merge'] != 'both') | moved][columns]
+    order = {'New entrant': 0, 'Drop-out': 1, 'Upside change': 2}
+    return diff.sort_values(['Change', 'Ticker'], key=lambda col: col.map(order) if col.name == 'Change' else col,
+                            ignore_index=True)
+
+def write_screen_diff(screen, diff, run_at):
+    """Write a run's diff as CSV under SCREEN_ALERTS_DIR and return the path"""
+    os.makedirs(SCREEN_ALERTS_DIR, exist_ok=True)
+    slug = ''.join(ch if ch.isalnum() else '_' for ch in screen['name']).strip('_') or f"screen_{screen['screen_id']}"
+    path = os.path.join(SCREEN_ALERTS_DIR, f"{slug}_{run_at.strftime('%Y%m%d_%H%M%S')}.csv")
+    diff.to_csv(path, index=False)
+    return path
+
+def run_saved_screen(screen_id):
+    """Run a saved screen to completion, diff it against the previous run and record the run"""
+    screen = next((s for s in list_saved_screens() if s['screen_id'] == screen_id), None)
+    if not screen:
+        return None
+    run_at = datetime.now()
+    update_saved_screen(screen_id, last_run_at=run_at.isoformat(timespec='seconds'))
+    
+    # Always scan live data; a run reusing the last result would never show changes
+    job_id = start_screen_job(screen['industry'], screen['strategy'], screen['max_results'], use_cache=False)
+    join_screen_job(job_id)
+    job = get_screen_job(job_id)
+    
+    run = {
+        'screen_id': screen_id, 'job_id': job_id, 'run_at': run_at.isoformat(timespec='seconds'),
+        'status': job['status'] if job else 'failed', 'result_count': 0,
+        'new_entrants': 0, 'drop_outs': 0, 'upside_changes': 0, 'diff_path': None
+    }
+    if job and job['status'] == 'done':
+        current = load_screen_job_results(job_id, screen['max_results'])
+        previous_run = next((r for r in list_saved_screen_runs(screen_id) if r['status'] == 'done'), None)
+        previous = (load_screen_job_results(previous_run['job_id'], screen['max_results'])
+                    if previous_run else pd.DataFrame())
+        diff = diff_screen_results(previous, current)
+        counts = diff['Change'].value_counts()
+        run.update({
+            'result_count': len(current),
+            'new_entrants': int(counts.get('New entrant', 0)),
+            'drop_outs': int(counts.get('Drop-out', 0)),
+            'upside_changes': int(counts.get('Upside change', 0)),
+            'diff_path': write_screen_diff(screen, diff, run_at)
+        })
+    
+    columns = ', '.join(run)
+    placeholders = ', '.join('?' for _ in run)
+    with closing(get_store_connection()) as conn, conn:
+        conn.execute(f"INSERT INTO saved_screen_runs ({columns}) VALUES ({placeholders})", tuple(run.values()))
+    return run
+
+def due_saved_screens(now=None):
+    """Enabled screens whose time today has passed and that have not run since"""
+    now = now or datetime.now()
+    due = []
+    for screen in list_saved_screens():
+        if not screen['enabled']:
+            continue
+        hour, minute = (int(part) for part in screen['schedule_time'].split(':'))
+        scheduled = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if now >= scheduled and (not screen['last_run_at'] or screen['last_run_at'] < scheduled.isoformat()):
+            due.append(screen['screen_id'])
+    return due
+
+def trigger_saved_screen(screen_id, scheduler=None):
+    """Run a saved screen on a background thread unless it is already running"""
+    scheduler = scheduler or get_screen_scheduler()
+    with scheduler['lock']:
+        if screen_id in scheduler['running']:
+            return False
+        scheduler['running'].add(screen_id)
+    
+    def run():
+        try:
+            run_saved_screen(screen_id)
+        finally:
+            with scheduler['lock']:
+                scheduler['running'].discard(screen_id)
+    
+    threading.Thread(target=run, name=f"saved-screen-{screen_id}", daemon=True).start()
+    return True
+
+def _screen_scheduler_loop(scheduler):
+    """Scheduler thread body: start due screens every SCREEN_SCHEDULER_INTERVAL seconds"""
+    while True:
+        try:
+            for screen_id in due_saved_screens():
+                trigger_saved_screen(screen_id, scheduler)
+        except Exception:
+            # A bad screen or a transient error must not stop future schedules
+            pass
+        time.sleep(SCREEN_SCHEDULER_INTERVAL)
+
+@st.cache_resource
+def get_screen_scheduler():
+    """Process-wide scheduler for saved screens, started on first use.
+    
+    The state lives on the scheduler thread, so after the resource cache is
+    cleared the running thread (and its set of running screens) is found
+    again instead of a second loop being started.
+    """
+    for thread in threading.enumerate():
+        if thread.name == SCREEN_SCHEDULER_THREAD and thread.is_alive():
+            return thread.scheduler
+    scheduler = {'lock': threading.Lock(), 'running': set()}
+    thread = threading.Thread(
+        target=_screen_scheduler_loop, args=(scheduler,), name=SCREEN_SCHEDULER_THREAD, daemon=True
+    )
+    thread.scheduler = scheduler
+    thread.start()
+    return scheduler
+
+# ============================================================================
+# CHART GENERATION FUNCTIONS
+# ============================================================================
+def create_gauge_chart(upside_pe, upside_ev):
+    """Create professional dual gauge chart for valuations"""
+    fig = make_subplots(
+        rows=1, cols=2,
+        specs=[[{'type': 'indicator'}, {'type': 'indicator'}]],
+        horizontal_spacing=0.15
+    )
+    
+    # PE Multiple Gauge
+    fig.add_trace(go.Indicator(
+        mode="gauge+number+delta",
         value=upside_pe if upside_pe else 0,
         number={'suffix': "%", 'font': {'size': 28, 'color': '#e2e8f0', 'family': 'Inter'}},
         delta={'reference': 0, 'increasing': {'color': "#34d399"}, 'decreasing': {'color': "#f87171"}},
@@ -10822,77 +13296,733 @@ def create_pdf_report(company, ticker, sector, vals):
         spaceAfter=20
     )
     
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.HexColor('#64748b'),
-        alignment=TA_CENTER,
-        spaceAfter=30
-    )
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#64748b'),
+        alignment=TA_CENTER,
+        spaceAfter=30
+    )
+    
+    story = []
+    story.append(Paragraph("NYZTrade Comprehensive Analysis", title_style))
+    story.append(Paragraph("Professional Stock Valuation Report", subtitle_style))
+    story.append(Spacer(1, 10))
+    
+    # Company Info
+    story.append(Paragraph(f"{company}", styles['Heading2']))
+    story.append(Paragraph(f"Ticker: {ticker} | Sector: {sector}", styles['Normal']))
+    story.append(Paragraph(f"Report Date: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
+    story.append(Spacer(1, 30))
+    
+    # Calculate averages
+    ups = [v for v in [vals['upside_pe'], vals['upside_ev']] if v is not None]
+    avg_up = np.mean(ups) if ups else 0
+    fairs = [v for v in [vals['fair_value_pe'], vals['fair_value_ev']] if v is not None]
+    avg_fair = np.mean(fairs) if fairs else vals['price']
+    
+    # Fair Value Summary
+    fair_data = [
+        ['Metric', 'Value'],
+        ['Fair Value', f"₹ {avg_fair:,.2f}"],
+        ['Current Price', f"₹ {vals['price']:,.2f}"],
+        ['Potential Upside', f"{avg_up:+.2f}%"]
+    ]
+    fair_table = Table(fair_data, colWidths=[3*inch, 2.5*inch])
+    fair_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+        ('FONTSIZE', (0, 1), (-1, -1), 11),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ]))
+    story.append(fair_table)
+    story.append(Spacer(1, 25))
+    
+    # Disclaimer
+    disclaimer_style = ParagraphStyle(
+        'Disclaimer',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.HexColor('#94a3b8'),
+        spaceBefore=20
+    )
+    story.append(Paragraph(
+        "DISCLAIMER: This report is for educational purposes only and does not constitute financial advice. "
+        "Always consult a qualified financial advisor before making investment decisions.",
+        disclaimer_style
+    ))
+    
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+# ============================================================================
+# MAIN APPLICATION
+# ============================================================================
+# Rows per page in result grids; the first is the default (small pages suit mobile)
+RESULTS_PAGE_SIZES = [25, 50, 100]
+
+# Text columns the grid filter searches
+RESULTS_SEARCH_COLUMNS = ['Ticker', 'Name', 'Industry']
+
+def _reset_results_page(key):
+    """Back to the first page after the filter, sort or page size changes"""
+    st.session_state[f"{key}_page"] = 1
+
+def page_results(results, search="", sort_column=None, descending=True, page=1, page_size=RESULTS_PAGE_SIZES[0]):
+    """Filter, sort and slice a results table; returns (page rows, matching row count, page count)"""
+    view = results
+    if search:
+        mask = pd.Series(False, index=view.index)
+        for column in RESULTS_SEARCH_COLUMNS:
+            if column in view.columns:
+                mask |= view[column].astype(str).str.contains(search, case=False, regex=False)
+        view = view[mask]
+    if sort_column:
+        view = view.sort_values(sort_column, ascending=not descending, na_position='last', kind='stable')
+    pages = max(1, -(-len(view) // page_size))
+    page = min(max(page, 1), pages)
+    return view.iloc[(page - 1) * page_size:page * page_size], len(view), pages
+
+def show_results_grid(results, key, column_config=None, default_sort='Upside %'):
+    """Paginated results table: filtering, sorting and slicing run on the server, so only
+    the visible page is serialized to the browser"""
+    columns = list(results.columns)
+    reset = {'on_change': _reset_results_page, 'args': (key,)}
+    
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input("🔍 Filter", key=f"{key}_search", placeholder="Ticker, name or industry", **reset)
+    with col2:
+        sort_column = st.selectbox(
+            "Sort By", columns, index=columns.index(default_sort) if default_sort in columns else 0,
+            key=f"{key}_sort", **reset
+        )
+    with col3:
+        descending = st.selectbox("Order", ["⬇️ Desc", "⬆️ Asc"], key=f"{key}_order", **reset) == "⬇️ Desc"
+    with col4:
+        page_size = st.selectbox("Rows", RESULTS_PAGE_SIZES, key=f"{key}_size", **reset)
+    
+    page_key = f"{key}_page"
+    page_rows, matching, pages = page_results(
+        results, search.strip(), sort_column, descending, st.session_state.get(page_key, 1), page_size
+    )
+    # Keep the page in range when the results shrink (e.g. a new snapshot)
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 1), 1), pages)
+    
+    st.dataframe(
+        page_rows,
+        column_config=column_config,
+        use_container_width=True,
+        hide_index=True,
+        height=min(len(page_rows), 15) * 35 + 38
+    )
+    
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    with col2:
+        if matching:
+            first = (st.session_state[page_key] - 1) * page_size + 1
+            st.caption(
+                f"Showing {first:,}–{first + len(page_rows) - 1:,} of {matching:,} stocks · "
+                f"page {st.session_state[page_key]} of {pages}"
+            )
+        else:
+            st.caption("No stocks match the filter")
+
+def show_screen_timing(summary):
+    """Stage breakdown, cache/retry counts and slowest tickers for a screen run"""
+    if not summary or not summary['tickers']:
+        return
+    with st.expander("⏱️ Run Timing"):
+        tickers = summary['tickers']
+        lookups = summary['cache_hits'] + summary['cache_misses']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Tickers Timed", f"{tickers:,}")
+        col2.metric("Throughput", f"{summary['rate']:.2f}/s" if summary['rate'] else "N/A")
+        col3.metric("Cache Hit Rate", f"{summary['cache_hits'] / lookups:.0%}" if lookups else "N/A")
+        col4.metric("Retries", f"{summary['retries']:,}")
+        
+        stage_total = sum(summary['stages'].values())
+        st.dataframe(pd.DataFrame([
+            {
+                'Stage': stage,
+                'Total (s)': seconds,
+                'Per Ticker (ms)': seconds / tickers * 1000,
+                'Share %': seconds / stage_total * 100 if stage_total else 0.0
+            }
+            for stage, seconds in summary['stages'].items()
+        ]).round(2), use_container_width=True, hide_index=True)
+        
+        if summary['slowest']:
+            st.caption("Slowest tickers (seconds per stage)")
+            st.dataframe(pd.DataFrame([
+                {'Ticker': ticker, 'Total (s)': seconds, **stages}
+                for seconds, ticker, stages in summary['slowest']
+            ]).round(3), use_container_width=True, hide_index=True)
+    
+def show_screen_job(job_id, strategy_names):
+    """Render a screener job, polling while it runs in the background"""
+    running = is_screen_job_running(job_id)
+    panel = st.fragment(run_every=SCREEN_JOB_POLL_SECONDS if running else None)(_screen_job_panel)
+    panel(job_id, strategy_names, running)
+
+def _screen_job_panel(job_id, strategy_names, was_running):
+    """Job header, progress/controls and the results found so far"""
+    job = get_screen_job(job_id)
+    if not job:
+        st.warning("❌ Screener job not found")
+        return
+    
+    running = is_screen_job_running(job_id)
+    if was_running and not running:
+        # Finished since the last poll: rerun the page once to stop polling
+        st.rerun()
+    
+    industry = job['industry']
+    strategy_name = strategy_names.get(job['strategy'], job['strategy'])
+    sector = get_sector_for_industry(industry)
+    
+    st.markdown(f'''
+    <div class="highlight-box">
+        <h3>📊 {strategy_name}</h3>
+        <p><strong>Industry:</strong> {industry}</p>
+        <p><strong>Sector:</strong> {sector}</p>
+        <p><strong>Universe:</strong> {job['total']:,} stocks</p>
+    </div>
+    ''', unsafe_allow_html=True)
+    
+    processed = screen_job_progress(job_id, job)
+    timing = screen_job_timing(job_id, job)
+    if running:
+        if screen_job_status(job_id, job) == 'queued':
+            text = f"⏳ Queued behind {SCREEN_JOB_CONCURRENCY} running screens · job {job_id}"
+        else:
+            throughput = (
+                f" · {timing['rate']:.1f} stocks/s · ETA {format_duration(timing['eta'])}"
+                if timing and timing['rate'] else ""
+            )
+            text = f"🔍 Screening {processed:,}/{job['total']:,} stocks{throughput} · job {job_id}"
+        st.progress(processed / job['total'] if job['total'] else 1.0, text=text)
+        if st.button("⏹️ Stop Screener"):
+            stop_screen_job(job_id)
+    elif job['status'] != 'done':
+        reason = job['error'] or "interrupted"
+        st.info(f"⏸️ Job {job_id} is {job['status']} ({reason}) at {processed:,}/{job['total']:,} stocks")
+        if st.button("▶️ Resume Screener"):
+            launch_screen_job(job_id)
+            st.rerun()
+    
+    show_screen_timing(timing)
+    
+    # Reruns (sorting, downloads, polls without progress) reuse the memoised snapshot
+    snapshot = load_screen_job_snapshot(
+        job_id, job['max_results'], (job['processed'], job['found'], job['status'])
+    )
+    results_df = snapshot['results']
+    
+    if results_df.empty:
+        if not running:
+            st.warning(f"❌ No stocks found matching {strategy_name} criteria in {industry}")
+        return
+    
+    # Display results
+    if running:
+        st.caption(f"⏳ Best {len(results_df)} of {job['found']} qualifying so far...")
+    else:
+        st.markdown(f'''
+        <div class="success-message">
+            ✅ Found <strong>{job['found']}</strong> opportunities in {industry}, showing the best {len(results_df)}<br>
+            🎯 Strategy: {strategy_name}
+        </div>
+        ''', unsafe_allow_html=True)
+    
+    # Select key columns for display; formatting is declarative so values stay numeric
+    display_columns = ['Ticker', 'Name', 'Price', 'Fair Value', 'Upside %', 'PE Ratio', 'Market Cap',
+                       'From 52W High %', 'Cap Type']
+    display_df = screen_display_frame(results_df, display_columns)
+    
+    # Display table
+    show_results_grid(display_df, f"job_{job_id}", SCREEN_COLUMN_CONFIG)
+    
+    # Download CSV
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"NYZTrade_{industry.replace(' ', '_')}_{job['strategy']}_{timestamp}.csv"
+    
+    st.download_button(
+        f"📥 Download Results ({len(results_df)} stocks)",
+        data=snapshot['csv'],
+        file_name=filename,
+        mime="text/csv",
+        use_container_width=True
+    )
+
+def show_sector_screen(sector_screen, strategy_names):
+    """Render a sector screen, polling while any of its industry jobs runs"""
+    running = any(is_screen_job_running(job_id) for job_id in sector_screen['job_ids'].values())
+    panel = st.fragment(run_every=SCREEN_JOB_POLL_SECONDS if running else None)(_sector_screen_panel)
+    panel(sector_screen, strategy_names, running)
+
+def _sector_screen_panel(sector_screen, strategy_names, was_running):
+    """Sector header, per-industry progress and summary, merged results"""
+    job_ids = sector_screen['job_ids']
+    running = any(is_screen_job_running(job_id) for job_id in job_ids.values())
+    if was_running and not running:
+        # Finished since the last poll: rerun the page once to stop polling
+        st.rerun()
+    
+    strategy_name = strategy_names.get(sector_screen['strategy'], sector_screen['strategy'])
+    results_df, summary_df = load_sector_screen(job_ids)
+    
+    st.markdown(f'''
+    <div class="highlight-box">
+        <h3>📊 {strategy_name}</h3>
+        <p><strong>Sector:</strong> {sector_screen['sector']}</p>
+        <p><strong>Industries:</strong> {len(job_ids)}</p>
+        <p><strong>Universe:</strong> {int(summary_df['Universe'].sum()) if not summary_df.empty else 0:,} stocks</p>
+    </div>
+    ''', unsafe_allow_html=True)
+    
+    if summary_df.empty:
+        st.warning("❌ No industries to screen in this sector")
+        return
+    
+    screened = int(summary_df['Screened'].sum())
+    universe = int(summary_df['Universe'].sum())
+    if running:
+        # Industries screen in parallel, so sector throughput is the sum of the running jobs'
+        rate = summary_df.loc[summary_df['Status'] == 'running', 'Stocks/s'].sum()
+        throughput = f" · {rate:.1f} stocks/s · ETA {format_duration((universe - screened) / rate)}" if rate else ""
+        st.progress(
+            screened / universe if universe else 1.0, text=f"🔍 Screening {screened:,}/{universe:,} stocks{throughput}"
+        )
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Qualifying Stocks", f"{int(summary_df['Qualifying'].sum()):,}")
+    col2.metric("Industries With Hits", f"{int((summary_df['Qualifying'] > 0).sum())}/{len(summary_df)}")
+    col3.metric("Median Upside", f"{results_df['Upside %'].median():.1f}%" if not results_df.empty else "N/A")
+    col4.metric("Best Upside", f"{results_df['Upside %'].max():.1f}%" if not results_df.empty else "N/A")
+    
+    st.markdown("#### 🏭 Industry Breakdown")
+    st.dataframe(
+        summary_df.sort_values('Qualifying', ascending=False),
+        column_config={**SCREEN_COLUMN_CONFIG, 'Stocks/s': st.column_config.NumberColumn(format="%.1f")},
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    if results_df.empty:
+        if not running:
+            st.warning(f"❌ No stocks found matching {strategy_name} criteria in {sector_screen['sector']}")
+        return
+    
+    st.markdown("#### 📋 Sector Results")
+    show_results_grid(
+        screen_display_frame(results_df, ['Ticker', 'Name', 'Industry', 'Price', 'Fair Value', 'Upside %',
+                                          'PE Ratio', 'Industry PE Benchmark', 'Cap Type']),
+        f"sector_{sector_screen['sector']}_{sector_screen['strategy']}",
+        SCREEN_COLUMN_CONFIG
+    )
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    st.download_button(
+        f"📥 Download Results ({len(results_df)} stocks)",
+        data=results_df.to_csv(index=False),
+        file_name=f"NYZTrade_{sector_screen['sector'].replace(' ', '_')}_{sector_screen['strategy']}_{timestamp}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+# Strategies offered by the interactive and scheduled screeners
+SCREENER_STRATEGY_OPTIONS = [
+    ("undervalued", "🎯 Undervalued Stocks (15%+ upside)"),
+    ("undervalued_near_high", "🚀 Undervalued Near 52W High"),
+    ("undervalued_supertrend", "📈 Undervalued + SuperTrend Bullish"),
+    ("undervalued_rsi_macd", "⚡ Undervalued + RSI/MACD Momentum")
+]
+
+@st.fragment
+def _screener_controls():
+    """Screener sidebar; choices rerun only this fragment, starting a screen reruns the page"""
+    screen_scope = st.radio("Screen Scope", ["🏭 Industry", "🏢 Sector"], horizontal=True)
+    
+    if screen_scope == "🏭 Industry":
+        # Industry selection with stock counts
+        selected_industry_with_count = st.selectbox("Select Industry", industry_select_options())
+        selected_industry = selected_industry_with_count.split(" (")[0]  # Extract industry name
+    else:
+        # Sector selection with industry counts
+        sector_options = [
+            f"{sector} ({len(get_sector_industries(sector))} industries)" for sector in get_all_sectors()
+        ]
+        selected_sector_with_count = st.selectbox("Select Sector", sector_options)
+        selected_sector = selected_sector_with_count.split(" (")[0]
+    
+    # Strategy selection
+    strategy_choice = st.selectbox(
+        "Screening Strategy",
+        SCREENER_STRATEGY_OPTIONS,
+        format_func=lambda x: x[1]
+    )
+    
+    strategy_type = strategy_choice[0]
+    
+    # Parameters
+    max_results = st.slider(
+        "Max Results" if screen_scope == "🏭 Industry" else "Max Results per Industry", 10, 100, 30
+    )
+    
+    use_cached_results = not st.checkbox(
+        "Force fresh scan", value=False,
+        help="Ignore a recent identical screen whose data has not changed"
+    )
+    
+    # Run screener as background jobs; the session only keeps their IDs
+    if st.button("🚀 Run Screener", type="primary"):
+        if screen_scope == "🏭 Industry":
+            st.session_state['screen_job_id'] = start_screen_job(
+                selected_industry, strategy_type, max_results, use_cached_results
+            )
+            st.session_state.pop('sector_screen', None)
+        else:
+            st.session_state['sector_screen'] = {
+                'sector': selected_sector,
+                'strategy': strategy_type,
+                'job_ids': start_sector_screen(selected_sector, strategy_type, max_results, use_cached_results)
+            }
+            st.session_state.pop('screen_job_id', None)
+        st.rerun()
+    
+    # Reattach to an earlier job (e.g. after a reload or from another session)
+    recent_jobs = list_screen_jobs()
+    if recent_jobs:
+        with st.expander("🗂️ Screener Jobs"):
+            job_choice = st.selectbox(
+                "Recent Jobs",
+                recent_jobs,
+                format_func=lambda job: f"{job['industry']} · {job['strategy']} · {job['status']} ({job['created_at'][5:16]})"
+            )
+            if st.button("🔗 Reattach"):
+                st.session_state['screen_job_id'] = job_choice['job_id']
+                st.session_state.pop('sector_screen', None)
+                st.rerun()
+
+@st.fragment
+def _stock_selector():
+    """Stock picker sidebar; searching and browsing rerun only this fragment"""
+    # Stock selection methods
+    st.subheader("Stock Selection")
+    
+    input_method = st.radio(
+        "Input Method",
+        ["🔍 Search by Name", "✏️ Direct Ticker", "📋 Browse by Industry"]
+    )
+    
+    selected_ticker = None
+    
+    if input_method == "🔍 Search by Name":
+        search_query = st.text_input("Search Company", placeholder="e.g., Reliance, TCS, HDFC")
+        
+        if search_query and len(search_query) >= 2:
+            search_results = search_stocks_by_name(search_query, 15)
+            if search_results:
+                options = [f"{r['ticker']} - {r['name']}" for r in search_results]
+                selected = st.selectbox("Select Stock", [""] + options)
+                if selected:
+                    selected_ticker = selected.split(" - ")[0]
+            else:
+                st.info("No stocks found")
+    
+    elif input_method == "✏️ Direct Ticker":
+        selected_ticker = st.text_input("Enter Ticker", placeholder="e.g., RELIANCE.NS").upper()
+    
+    elif input_method == "📋 Browse by Industry":
+        selected_browse_industry_with_count = st.selectbox("Select Industry", [""] + industry_select_options())
+        
+        if selected_browse_industry_with_count:
+            browse_industry = selected_browse_industry_with_count.split(" (")[0]  # Extract industry name
+            industry_stocks = get_stocks_by_category(browse_industry)
+            stock_options = [f"{ticker} - {name}" for ticker, name in industry_stocks.items()]
+            selected_stock = st.selectbox("Select Stock", [""] + sorted(stock_options))
+            if selected_stock:
+                selected_ticker = selected_stock.split(" - ")[0]
+    
+    # Analyze button
+    if selected_ticker and st.button("🚀 Analyze", type="primary"):
+        st.session_state['analysis_ticker'] = selected_ticker
+        st.rerun()
+
+@st.fragment
+def show_stock_analysis(selected_ticker):
+    """Valuation report and charts for one stock; reruns here don't touch the rest of the page"""
+    # Get stock info for industry context
+    stock_info = get_stock_info(selected_ticker)
+    
+    with st.spinner(f"Analyzing {selected_ticker}..."):
+        info, error = fetch_stock_data(selected_ticker)
+    
+    if error or not info:
+        st.error(f"❌ Error: {error if error else 'Failed to fetch stock data'}")
+        return
+    
+    vals = calculate_valuations(info, stock_info['category'] if stock_info else None)
+    if not vals:
+        st.error("❌ Unable to calculate valuations for this stock")
+        return
+    
+    # Data Quality Validation
+    data_quality_issues = []
+    if not vals.get('trailing_pe') or vals['trailing_pe'] <= 0:
+        data_quality_issues.append("PE Ratio unavailable or negative")
+    if not vals.get('trailing_eps') or vals['trailing_eps'] <= 0:
+        data_quality_issues.append("EPS unavailable or negative")
+    if not vals.get('fair_value_pe') and not vals.get('fair_value_ev'):
+        data_quality_issues.append("No fair value calculation possible")
+    
+    # Show data quality alert if issues found
+    if data_quality_issues:
+        st.warning(f"""
+        ⚠️ **Data Quality Alert**: Unaudited data suspected and thus limited valuation possible
+        
+        **Issues detected:**
+        - {chr(10).join(['• ' + issue for issue in data_quality_issues])}
+        
+        **Recommendation**: Verify financial data from official sources before making investment decisions.
+        """)
+    
+    # Extract company info
+    company = info.get('longName', selected_ticker)
+    sector = info.get('sector', 'N/A')
+    industry = info.get('industry', 'N/A')
+    
+    # Company Header
+    st.markdown(f'''
+    <div class="company-header">
+        <div class="company-title">{company}</div>
+        <div class="company-info">
+            🏷️ {selected_ticker} • 🏢 {sector} • 🏭 {industry}
+        </div>
+    </div>
+    ''', unsafe_allow_html=True)
+    
+    # Calculate average values
+    ups = [v for v in [vals['upside_pe'], vals['upside_ev']] if v is not None]
+    avg_up = np.mean(ups) if ups else 0
+    fairs = [v for v in [vals['fair_value_pe'], vals['fair_value_ev']] if v is not None]
+    avg_fair = np.mean(fairs) if fairs else vals['price']
+    
+    # Main metrics row
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        # Fair Value Card
+        st.markdown(f'''
+        <div class="fair-value-card">
+            <div class="fair-value-title">📊 Calculated Fair Value</div>
+            <div class="fair-value-amount">₹{avg_fair:,.2f}</div>
+            <div class="fair-value-details">
+                Current Price: ₹{vals["price"]:,.2f}<br>
+                {"📈" if avg_up > 0 else "📉"} {avg_up:+.2f}% Potential
+            </div>
+        </div>
+        ''', unsafe_allow_html=True)
+    
+    with col2:
+        # Recommendation
+        if avg_up > 25:
+            rec_class, rec_text, rec_icon = "rec-strong-buy", "Significantly Undervalued", "🚀"
+        elif avg_up > 15:
+            rec_class, rec_text, rec_icon = "rec-buy", "Undervalued", "✅"
+        elif avg_up > 0:
+            rec_class, rec_text, rec_icon = "rec-buy", "Fairly Valued", "📥"
+        elif avg_up > -10:
+            rec_class, rec_text, rec_icon = "rec-hold", "Slightly Overvalued", "⏸️"
+        else:
+            rec_class, rec_text, rec_icon = "rec-avoid", "Overvalued", "⚠️"
+        
+        st.markdown(f'''
+        <div class="recommendation-card {rec_class}">
+            <h3>{rec_icon} {rec_text}</h3>
+            <p>Expected Return: {avg_up:+.2f}%</p>
+        </div>
+        ''', unsafe_allow_html=True)
+        
+        # PDF Download
+        if not data_quality_issues:  # Only offer PDF if data quality is good
+            pdf = create_pdf_report(company, selected_ticker, sector, vals)
+            st.download_button(
+                "📥 Download PDF Report",
+                data=pdf,
+                file_name=f"NYZTrade_{selected_ticker}_{datetime.now().strftime('%Y%m%d')}.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
+    
+    # Key Metrics Cards
+    st.markdown('<div class="section-header">📊 Key Metrics</div>', unsafe_allow_html=True)
+    
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    
+    metrics_data = [
+        (m1, "💰", f"₹{vals['price']:,.2f}", "Current Price"),
+        (m2, "📈", f"{vals['trailing_pe']:.2f}x" if vals['trailing_pe'] else "N/A", "PE Ratio"),
+        (m3, "💵", f"₹{vals['trailing_eps']:.2f}" if vals['trailing_eps'] else "N/A", "EPS (TTM)"),
+        (m4, "🏦", f"₹{vals['market_cap']/10000000:,.0f}Cr" if vals['market_cap'] else "N/A", "Market Cap"),
+        (m5, "📊", f"{vals['current_ev_ebitda']:.2f}x" if vals['current_ev_ebitda'] else "N/A", "EV/EBITDA"),
+        (m6, "📚", f"{vals['pb_ratio']:.2f}x" if vals['pb_ratio'] else "N/A", "P/B Ratio")
+    ]
+    
+    for col, icon, value, label in metrics_data:
+        with col:
+            st.markdown(f'''
+            <div class="metric-card">
+                <div style="font-size: 1.5rem;">{icon}</div>
+                <div class="metric-value">{value}</div>
+                <div class="metric-label">{label}</div>
+            </div>
+            ''', unsafe_allow_html=True)
+    
+    # Charts Section
+    st.markdown("---")
+    
+    chart_col1, chart_col2 = st.columns(2)
+    
+    with chart_col1:
+        st.markdown('<div class="section-header">🎯 Valuation Gauges</div>', unsafe_allow_html=True)
+        if vals['upside_pe'] is not None or vals['upside_ev'] is not None:
+            fig_gauge = create_gauge_chart(
+                vals['upside_pe'] if vals['upside_pe'] else 0,
+                vals['upside_ev'] if vals['upside_ev'] else 0
+            )
+            st.plotly_chart(fig_gauge, use_container_width=True)
+        else:
+            st.info("Insufficient data for gauge charts")
+    
+    with chart_col2:
+        st.markdown('<div class="section-header">📊 Price vs Fair Value</div>', unsafe_allow_html=True)
+        fig_bar = create_valuation_comparison_chart(vals)
+        if fig_bar:
+            st.plotly_chart(fig_bar, use_container_width=True)
+        else:
+            st.info("Insufficient data for comparison chart")
     
-    story = []
-    story.append(Paragraph("NYZTrade Comprehensive Analysis", title_style))
-    story.append(Paragraph("Professional Stock Valuation Report", subtitle_style))
-    story.append(Spacer(1, 10))
+    # Additional Chart
+    st.markdown('<div class="section-header">📍 52-Week Range</div>', unsafe_allow_html=True)
+    range_html = create_52week_range_display(vals)
+    if range_html:
+        st.markdown(range_html, unsafe_allow_html=True)
+    else:
+        st.info("52-week data not available")
     
-    # Company Info
-    story.append(Paragraph(f"{company}", styles['Heading2']))
-    story.append(Paragraph(f"Ticker: {ticker} | Sector: {sector}", styles['Normal']))
-    story.append(Paragraph(f"Report Date: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-    story.append(Spacer(1, 30))
+    # Detailed Valuation Methods
+    st.markdown("---")
+    st.markdown('<div class="section-header">📋 Valuation Breakdown</div>', unsafe_allow_html=True)
+    st.caption(f"Benchmark set: {vals['benchmark_version']}")
     
-    # Calculate averages
-    ups = [v for v in [vals['upside_pe'], vals['upside_ev']] if v is not None]
-    avg_up = np.mean(ups) if ups else 0
-    fairs = [v for v in [vals['fair_value_pe'], vals['fair_value_ev']] if v is not None]
-    avg_fair = np.mean(fairs) if fairs else vals['price']
+    val_col1, val_col2 = st.columns(2)
     
-    # Fair Value Summary
-    fair_data = [
-        ['Metric', 'Value'],
-        ['Fair Value', f"₹ {avg_fair:,.2f}"],
-        ['Current Price', f"₹ {vals['price']:,.2f}"],
-        ['Potential Upside', f"{avg_up:+.2f}%"]
-    ]
-    fair_table = Table(fair_data, colWidths=[3*inch, 2.5*inch])
-    fair_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-        ('FONTSIZE', (0, 1), (-1, -1), 11),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-    ]))
-    story.append(fair_table)
-    story.append(Spacer(1, 25))
+    with val_col1:
+        if vals['fair_value_pe'] and vals['trailing_pe']:
+            st.markdown(f'''
+            <div class="valuation-box">
+                <div class="valuation-method">📈 PE Multiple Method</div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Current PE</span>
+                    <span class="valuation-value">{vals['trailing_pe']:.2f}x</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Industry PE</span>
+                    <span class="valuation-value">{vals['industry_pe']:.2f}x</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">EPS (TTM)</span>
+                    <span class="valuation-value">₹{vals['trailing_eps']:.2f}</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Fair Value (PE)</span>
+                    <span class="valuation-value">₹{vals['fair_value_pe']:,.2f}</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Upside (PE)</span>
+                    <span class="valuation-value">{vals['upside_pe']:+.2f}%</span>
+                </div>
+            </div>
+            ''', unsafe_allow_html=True)
+        else:
+            st.info("PE valuation not available due to data quality issues")
     
-    # Disclaimer
-    disclaimer_style = ParagraphStyle(
-        'Disclaimer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#94a3b8'),
-        spaceBefore=20
-    )
-    story.append(Paragraph(
-        "DISCLAIMER: This report is for educational purposes only and does not constitute financial advice. "
-        "Always consult a qualified financial advisor before making investment decisions.",
-        disclaimer_style
-    ))
+    with val_col2:
+        if vals['fair_value_ev'] and vals['current_ev_ebitda']:
+            st.markdown(f'''
+            <div class="valuation-box">
+                <div class="valuation-method">💼 EV/EBITDA Method</div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Current EV/EBITDA</span>
+                    <span class="valuation-value">{vals['current_ev_ebitda']:.2f}x</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Industry EV/EBITDA</span>
+                    <span class="valuation-value">{vals['industry_ev_ebitda']:.2f}x</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">EBITDA</span>
+                    <span class="valuation-value">₹{vals['ebitda']/10000000:,.0f} Cr</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Fair Value (EV)</span>
+                    <span class="valuation-value">₹{vals['fair_value_ev']:,.2f}</span>
+                </div>
+                <div class="valuation-row">
+                    <span class="valuation-label">Upside (EV)</span>
+                    <span class="valuation-value">{vals['upside_ev']:+.2f}%</span>
+                </div>
+            </div>
+            ''', unsafe_allow_html=True)
+        else:
+            st.info("EV/EBITDA valuation not available due to data quality issues")
+
+@st.fragment
+def show_industry_details():
+    """Industry drill-down; picking an industry or loading signals reruns only this fragment"""
+    st.markdown("#### 🔍 Explore Industry Details")
     
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+    # Industry options with stock counts
+    selected_explore_industry_with_count = st.selectbox("Select Industry", [""] + industry_select_options())
+    
+    if selected_explore_industry_with_count:
+        explore_industry = selected_explore_industry_with_count.split(" (")[0]  # Extract industry name
+        industry_stocks = get_stocks_by_category(explore_industry)
+        sector = get_sector_for_industry(explore_industry)
+        
+        st.info(f"**{explore_industry}** • Sector: {sector} • {len(industry_stocks)} stocks")
+        
+        # Show stocks in expandable section
+        if st.expander(f"View all {len(industry_stocks)} stocks"):
+            stocks_df = pd.DataFrame(list(industry_stocks.items()), columns=['Ticker', 'Company'])
+            st.dataframe(stocks_df, use_container_width=True, hide_index=True)
+        
+        if st.button("📈 Load Technical Signals"):
+            with st.spinner(f"Updating technical signals for {len(industry_stocks)} stocks..."):
+                industry_signals = refresh_indicator_states(list(industry_stocks))
+            
+            signal_rows = [
+                {'Ticker': ticker, 'Company': industry_stocks[ticker], **signals}
+                for ticker, signals in industry_signals.items() if signals
+            ]
+            if signal_rows:
+                st.dataframe(pd.DataFrame(signal_rows), use_container_width=True, hide_index=True)
+            else:
+                st.warning("❌ No price history available for this industry")
 
-# ============================================================================
-# MAIN APPLICATION
-# ============================================================================
 def main():
     # Header
     st.markdown(f'''
@@ -10941,396 +14071,36 @@ def main():
         # Mode selection
         mode = st.selectbox(
             "Choose Mode",
-            ["🎯 Industry Screener", "📈 Individual Analysis", "📊 Industry Explorer"]
+            ["🎯 Industry Screener", "📈 Individual Analysis", "📊 Industry Explorer", "📐 Relative Valuation",
+             "🧮 Query Screener", "⏰ Scheduled Screens", "🧪 Strategy Lab"]
         )
     
+    # Saved screens run in the background whether or not anyone is viewing them
+    get_screen_scheduler()
+    
     # Mode-specific content
     if mode == "🎯 Industry Screener":
         
         st.markdown("### 🎯 Industry-Based Stock Screener")
         
-        # Industry selection with stock counts
-        industries = sorted(get_all_categories())
-        industry_options = []
-        for industry in industries:
-            stock_count = len(get_stocks_by_category(industry))
-            industry_options.append(f"{industry} ({stock_count} stocks)")
-        
-        selected_industry_with_count = st.sidebar.selectbox("Select Industry", industry_options)
-        selected_industry = selected_industry_with_count.split(" (")[0]  # Extract industry name
-        
-        # Strategy selection  
-        strategy_options = [
-            ("undervalued", "🎯 Undervalued Stocks (15%+ upside)"),
-            ("undervalued_near_high", "🚀 Undervalued Near 52W High"),
-            ("undervalued_supertrend", "📈 Undervalued + SuperTrend Bullish")
-           
-        ]
-        
-        strategy_choice = st.sidebar.selectbox(
-            "Screening Strategy",
-            strategy_options,
-            format_func=lambda x: x[1]
-        )
-        
-        strategy_type = strategy_choice[0]
-        strategy_name = strategy_choice[1]
+        with st.sidebar:
+            _screener_controls()
         
-        # Parameters
-        max_results = st.sidebar.slider("Max Results", 10, 100, 30)
-        
-        # Run screener
-        if st.sidebar.button("🚀 Run Screener", type="primary"):
-            
-            # Show industry info
-            industry_stocks = get_stocks_by_category(selected_industry)
-            sector = get_sector_for_industry(selected_industry)
-            
-            st.markdown(f'''
-            <div class="highlight-box">
-                <h3>📊 {strategy_name}</h3>
-                <p><strong>Industry:</strong> {selected_industry}</p>
-                <p><strong>Sector:</strong> {sector}</p>
-                <p><strong>Universe:</strong> {len(industry_stocks):,} stocks</p>
-            </div>
-            ''', unsafe_allow_html=True)
-            
-            # Run screener
-            with st.spinner(f"🔍 Screening {len(industry_stocks):,} stocks..."):
-                results_df = run_industry_screener(selected_industry, strategy_type, max_results)
-            
-            if results_df.empty:
-                st.warning(f"❌ No stocks found matching {strategy_name} criteria in {selected_industry}")
-            else:
-                # Display results
-                st.markdown(f'''
-                <div class="success-message">
-                    ✅ Found <strong>{len(results_df)}</strong> opportunities in {selected_industry}<br>
-                    🎯 Strategy: {strategy_name}
-                </div>
-                ''', unsafe_allow_html=True)
-                
-                # Sort results by upside
-                results_df = results_df.sort_values('Upside %', ascending=False)
-                
-                # Format display
-                display_df = results_df.copy()
-                
-                # Format currency columns
-                for col in ['Price', 'Fair Value']:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: f"₹{x:,.2f}" if pd.notna(x) else 'N/A')
-                
-                # Format percentage columns
-                for col in ['Upside %', 'ROE %', 'From 52W High %', 'From 52W Low %', 'Dividend Yield %']:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: f"{x:+.1f}%" if pd.notna(x) else 'N/A')
-                
-                # Format ratio columns
-                for col in ['PE Ratio', 'PB Ratio', 'Beta']:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: f"{x:.2f}" if pd.notna(x) else 'N/A')
-                
-                # Format market cap
-                if 'Market Cap' in display_df.columns:
-                    display_df['Market Cap'] = display_df['Market Cap'].apply(
-                        lambda x: f"₹{x/10000000:,.0f}Cr" if pd.notna(x) else 'N/A'
-                    )
-                
-                # Select key columns for display
-                display_columns = ['Ticker', 'Name', 'Price', 'Fair Value', 'Upside %', 'PE Ratio', 'From 52W High %', 'Cap Type']
-                
-                # Display table
-                st.dataframe(
-                    display_df[display_columns],
-                    use_container_width=True,
-                    hide_index=True,
-                    height=min(500, len(display_df) * 35 + 100)
-                )
-                
-                # Download CSV
-                csv = results_df.to_csv(index=False)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"NYZTrade_{selected_industry.replace(' ', '_')}_{strategy_type}_{timestamp}.csv"
-                
-                st.download_button(
-                    f"📥 Download Results ({len(results_df)} stocks)",
-                    data=csv,
-                    file_name=filename,
-                    mime="text/csv",
-                    use_container_width=True
-                )
+        if st.session_state.get('sector_screen'):
+            show_sector_screen(st.session_state['sector_screen'], dict(SCREENER_STRATEGY_OPTIONS))
+        elif st.session_state.get('screen_job_id'):
+            show_screen_job(st.session_state['screen_job_id'], dict(SCREENER_STRATEGY_OPTIONS))
     
     elif mode == "📈 Individual Analysis":
         
         st.markdown("### 📈 Individual Stock Analysis")
         
-        # Stock selection methods
-        st.sidebar.subheader("Stock Selection")
-        
-        input_method = st.sidebar.radio(
-            "Input Method",
-            ["🔍 Search by Name", "✏️ Direct Ticker", "📋 Browse by Industry"]
-        )
-        
-        selected_ticker = None
-        
-        if input_method == "🔍 Search by Name":
-            search_query = st.sidebar.text_input("Search Company", placeholder="e.g., Reliance, TCS, HDFC")
-            
-            if search_query and len(search_query) >= 2:
-                search_results = search_stocks_by_name(search_query, 15)
-                if search_results:
-                    options = [f"{r['ticker']} - {r['name']}" for r in search_results]
-                    selected = st.sidebar.selectbox("Select Stock", [""] + options)
-                    if selected:
-                        selected_ticker = selected.split(" - ")[0]
-                else:
-                    st.sidebar.info("No stocks found")
-        
-        elif input_method == "✏️ Direct Ticker":
-            selected_ticker = st.sidebar.text_input("Enter Ticker", placeholder="e.g., RELIANCE.NS").upper()
-        
-        elif input_method == "📋 Browse by Industry":
-            browse_industries = sorted(get_all_categories())
-            browse_industry_options = [""] + [f"{industry} ({len(get_stocks_by_category(industry))} stocks)" for industry in browse_industries]
-            selected_browse_industry_with_count = st.sidebar.selectbox("Select Industry", browse_industry_options)
-            
-            if selected_browse_industry_with_count:
-                browse_industry = selected_browse_industry_with_count.split(" (")[0]  # Extract industry name
-                industry_stocks = get_stocks_by_category(browse_industry)
-                stock_options = [f"{ticker} - {name}" for ticker, name in industry_stocks.items()]
-                selected_stock = st.sidebar.selectbox("Select Stock", [""] + sorted(stock_options))
-                if selected_stock:
-                    selected_ticker = selected_stock.split(" - ")[0]
+        with st.sidebar:
+            _stock_selector()
         
-        # Analyze button
-        if selected_ticker and st.sidebar.button("🚀 Analyze", type="primary"):
-            
-            # Get stock info for industry context
-            stock_info = get_stock_info(selected_ticker)
-            
-            with st.spinner(f"Analyzing {selected_ticker}..."):
-                info, error = fetch_stock_data(selected_ticker)
-            
-            if error or not info:
-                st.error(f"❌ Error: {error if error else 'Failed to fetch stock data'}")
-                st.stop()
-            
-            vals = calculate_valuations(info, stock_info['category'] if stock_info else None)
-            if not vals:
-                st.error("❌ Unable to calculate valuations for this stock")
-                st.stop()
-            
-            # Data Quality Validation
-            data_quality_issues = []
-            if not vals.get('trailing_pe') or vals['trailing_pe'] <= 0:
-                data_quality_issues.append("PE Ratio unavailable or negative")
-            if not vals.get('trailing_eps') or vals['trailing_eps'] <= 0:
-                data_quality_issues.append("EPS unavailable or negative")
-            if not vals.get('fair_value_pe') and not vals.get('fair_value_ev'):
-                data_quality_issues.append("No fair value calculation possible")
-            
-            # Show data quality alert if issues found
-            if data_quality_issues:
-                st.warning(f"""
-                ⚠️ **Data Quality Alert**: Unaudited data suspected and thus limited valuation possible
-                
-                **Issues detected:**
-                - {chr(10).join(['• ' + issue for issue in data_quality_issues])}
-                
-                **Recommendation**: Verify financial data from official sources before making investment decisions.
-                """)
-            
-            # Extract company info
-            company = info.get('longName', selected_ticker)
-            sector = info.get('sector', 'N/A')
-            industry = info.get('industry', 'N/A')
-            
-            # Company Header
-            st.markdown(f'''
-            <div class="company-header">
-                <div class="company-title">{company}</div>
-                <div class="company-info">
-                    🏷️ {selected_ticker} • 🏢 {sector} • 🏭 {industry}
-                </div>
-            </div>
-            ''', unsafe_allow_html=True)
-            
-            # Calculate average values
-            ups = [v for v in [vals['upside_pe'], vals['upside_ev']] if v is not None]
-            avg_up = np.mean(ups) if ups else 0
-            fairs = [v for v in [vals['fair_value_pe'], vals['fair_value_ev']] if v is not None]
-            avg_fair = np.mean(fairs) if fairs else vals['price']
-            
-            # Main metrics row
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                # Fair Value Card
-                st.markdown(f'''
-                <div class="fair-value-card">
-                    <div class="fair-value-title">📊 Calculated Fair Value</div>
-                    <div class="fair-value-amount">₹{avg_fair:,.2f}</div>
-                    <div class="fair-value-details">
-                        Current Price: ₹{vals["price"]:,.2f}<br>
-                        {"📈" if avg_up > 0 else "📉"} {avg_up:+.2f}% Potential
-                    </div>
-                </div>
-                ''', unsafe_allow_html=True)
-            
-            with col2:
-                # Recommendation
-                if avg_up > 25:
-                    rec_class, rec_text, rec_icon = "rec-strong-buy", "Significantly Undervalued", "🚀"
-                elif avg_up > 15:
-                    rec_class, rec_text, rec_icon = "rec-buy", "Undervalued", "✅"
-                elif avg_up > 0:
-                    rec_class, rec_text, rec_icon = "rec-buy", "Fairly Valued", "📥"
-                elif avg_up > -10:
-                    rec_class, rec_text, rec_icon = "rec-hold", "Slightly Overvalued", "⏸️"
-                else:
-                    rec_class, rec_text, rec_icon = "rec-avoid", "Overvalued", "⚠️"
-                
-                st.markdown(f'''
-                <div class="recommendation-card {rec_class}">
-                    <h3>{rec_icon} {rec_text}</h3>
-                    <p>Expected Return: {avg_up:+.2f}%</p>
-                </div>
-                ''', unsafe_allow_html=True)
-                
-                # PDF Download
-                if not data_quality_issues:  # Only offer PDF if data quality is good
-                    pdf = create_pdf_report(company, selected_ticker, sector, vals)
-                    st.download_button(
-                        "📥 Download PDF Report",
-                        data=pdf,
-                        file_name=f"NYZTrade_{selected_ticker}_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-            
-            # Key Metrics Cards
-            st.markdown('<div class="section-header">📊 Key Metrics</div>', unsafe_allow_html=True)
-            
-            m1, m2, m3, m4, m5, m6 = st.columns(6)
-            
-            metrics_data = [
-                (m1, "💰", f"₹{vals['price']:,.2f}", "Current Price"),
-                (m2, "📈", f"{vals['trailing_pe']:.2f}x" if vals['trailing_pe'] else "N/A", "PE Ratio"),
-                (m3, "💵", f"₹{vals['trailing_eps']:.2f}" if vals['trailing_eps'] else "N/A", "EPS (TTM)"),
-                (m4, "🏦", f"₹{vals['market_cap']/10000000:,.0f}Cr" if vals['market_cap'] else "N/A", "Market Cap"),
-                (m5, "📊", f"{vals['current_ev_ebitda']:.2f}x" if vals['current_ev_ebitda'] else "N/A", "EV/EBITDA"),
-                (m6, "📚", f"{vals['pb_ratio']:.2f}x" if vals['pb_ratio'] else "N/A", "P/B Ratio")
-            ]
-            
-            for col, icon, value, label in metrics_data:
-                with col:
-                    st.markdown(f'''
-                    <div class="metric-card">
-                        <div style="font-size: 1.5rem;">{icon}</div>
-                        <div class="metric-value">{value}</div>
-                        <div class="metric-label">{label}</div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-            
-            # Charts Section
-            st.markdown("---")
-            
-            chart_col1, chart_col2 = st.columns(2)
-            
-            with chart_col1:
-                st.markdown('<div class="section-header">🎯 Valuation Gauges</div>', unsafe_allow_html=True)
-                if vals['upside_pe'] is not None or vals['upside_ev'] is not None:
-                    fig_gauge = create_gauge_chart(
-                        vals['upside_pe'] if vals['upside_pe'] else 0,
-                        vals['upside_ev'] if vals['upside_ev'] else 0
-                    )
-                    st.plotly_chart(fig_gauge, use_container_width=True)
-                else:
-                    st.info("Insufficient data for gauge charts")
-            
-            with chart_col2:
-                st.markdown('<div class="section-header">📊 Price vs Fair Value</div>', unsafe_allow_html=True)
-                fig_bar = create_valuation_comparison_chart(vals)
-                if fig_bar:
-                    st.plotly_chart(fig_bar, use_container_width=True)
-                else:
-                    st.info("Insufficient data for comparison chart")
-            
-            # Additional Chart
-            st.markdown('<div class="section-header">📍 52-Week Range</div>', unsafe_allow_html=True)
-            range_html = create_52week_range_display(vals)
-            if range_html:
-                st.markdown(range_html, unsafe_allow_html=True)
-            else:
-                st.info("52-week data not available")
-            
-            # Detailed Valuation Methods
-            st.markdown("---")
-            st.markdown('<div class="section-header">📋 Valuation Breakdown</div>', unsafe_allow_html=True)
-            
-            val_col1, val_col2 = st.columns(2)
-            
-            with val_col1:
-                if vals['fair_value_pe'] and vals['trailing_pe']:
-                    st.markdown(f'''
-                    <div class="valuation-box">
-                        <div class="valuation-method">📈 PE Multiple Method</div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Current PE</span>
-                            <span class="valuation-value">{vals['trailing_pe']:.2f}x</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Industry PE</span>
-                            <span class="valuation-value">{vals['industry_pe']:.2f}x</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">EPS (TTM)</span>
-                            <span class="valuation-value">₹{vals['trailing_eps']:.2f}</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Fair Value (PE)</span>
-                            <span class="valuation-value">₹{vals['fair_value_pe']:,.2f}</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Upside (PE)</span>
-                            <span class="valuation-value">{vals['upside_pe']:+.2f}%</span>
-                        </div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                else:
-                    st.info("PE valuation not available due to data quality issues")
-            
-            with val_col2:
-                if vals['fair_value_ev'] and vals['current_ev_ebitda']:
-                    st.markdown(f'''
-                    <div class="valuation-box">
-                        <div class="valuation-method">💼 EV/EBITDA Method</div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Current EV/EBITDA</span>
-                            <span class="valuation-value">{vals['current_ev_ebitda']:.2f}x</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Industry EV/EBITDA</span>
-                            <span class="valuation-value">{vals['industry_ev_ebitda']:.2f}x</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">EBITDA</span>
-                            <span class="valuation-value">₹{vals['ebitda']/10000000:,.0f} Cr</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Fair Value (EV)</span>
-                            <span class="valuation-value">₹{vals['fair_value_ev']:,.2f}</span>
-                        </div>
-                        <div class="valuation-row">
-                            <span class="valuation-label">Upside (EV)</span>
-                            <span class="valuation-value">{vals['upside_ev']:+.2f}%</span>
-                        </div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                else:
-                    st.info("EV/EBITDA valuation not available due to data quality issues")
+        # The last analyzed stock stays on the page across other interactions
+        if st.session_state.get('analysis_ticker'):
+            show_stock_analysis(st.session_state['analysis_ticker'])
     
     elif mode == "📊 Industry Explorer":
         
@@ -11378,24 +14148,329 @@ def main():
         
         # Specific industry exploration
         st.markdown("---")
-        st.markdown("#### 🔍 Explore Industry Details")
+        show_industry_details()
+    
+    elif mode == "📐 Relative Valuation":
+        
+        st.markdown("### 📐 Relative Valuation vs Peers")
+        
+        industries = sorted(get_all_categories())
+        relative_industry = st.sidebar.selectbox("Industry", ["All Industries"] + industries)
+        
+        metric_options = [
+            ("pe", "PE Ratio"),
+            ("pb", "PB Ratio"),
+            ("ev_ebitda", "EV/EBITDA"),
+            ("roe", "ROE"),
+            ("margin", "Profit Margin"),
+            ("upside", "Upside")
+        ]
+        metric_choice = st.sidebar.selectbox("Metric", metric_options, format_func=lambda x: x[1])
+        rank_level = st.sidebar.radio("Compare Against", ["industry", "sector"], format_func=str.title)
+        deciles = st.sidebar.slider("Top Deciles", 1, 5, 1)
         
-        # Create industry options with stock counts
-        explore_industries = sorted(get_all_categories())
-        explore_industry_options = [""] + [f"{industry} ({len(get_stocks_by_category(industry))} stocks)" for industry in explore_industries]
-        selected_explore_industry_with_count = st.selectbox("Select Industry", explore_industry_options)
+        if relative_industry != "All Industries" and st.sidebar.button("🔄 Refresh Industry Data"):
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            
+            def show_progress(done, total, ticker):
+                progress_bar.progress(done / total)
+                status_text.text(f"Fetching {ticker} ({done}/{total})")
+            
+            stored = refresh_industry_fundamentals(relative_industry, show_progress)
+            progress_bar.empty()
+            status_text.empty()
+            st.success(f"✅ Stored fundamentals for {stored} stocks in {relative_industry}")
+        
+        if st.sidebar.button("♻️ Recalibrate Benchmarks"):
+            with st.spinner("Recalibrating benchmarks from stored fundamentals..."):
+                recalibrate_benchmarks(force=True)
+        
+        active_set = load_active_benchmark_set()
+        if active_set:
+            st.sidebar.caption(
+                f"Benchmark set v{active_set['version']} • {active_set['ticker_count']:,} stocks • "
+                f"{len(active_set['industries'])} calibrated industries • {active_set['created_at']}"
+            )
+        else:
+            st.sidebar.caption("Benchmark set: static constants")
+        
+        # Ranks need the full peer group, so rank the whole store before filtering
+        ranked_df = compute_relative_ranks(load_fundamentals_table())
+        if relative_industry != "All Industries" and not ranked_df.empty:
+            ranked_df = ranked_df[ranked_df['category'] == relative_industry]
+        
+        if ranked_df.empty:
+            st.info("No stored fundamentals yet. Run a screen or refresh an industry to populate the store.")
+        else:
+            metric_key, metric_label = metric_choice
+            picks_df = screen_relative_decile(ranked_df, metric_key, rank_level, deciles)
+            
+            st.markdown(f'''
+            <div class="highlight-box">
+                <h3>📐 Best {deciles * 10}% by {metric_label} within {rank_level}</h3>
+                <p><strong>Stored stocks:</strong> {len(ranked_df):,}</p>
+                <p><strong>Matches:</strong> {len(picks_df):,}</p>
+            </div>
+            ''', unsafe_allow_html=True)
+            
+            if picks_df.empty:
+                st.warning("❌ No stocks in the selected deciles")
+            else:
+                display_df = relative_valuation_table(picks_df, metric_key, metric_label, rank_level)
+                st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    elif mode == "🧮 Query Screener":
+        
+        st.markdown("### 🧮 Custom Query Screener")
+        st.caption("Screens the stored fundamentals of every screened or refreshed stock.")
+        
+        all_industries = "All industries"
+        query_scope = st.sidebar.selectbox("Industry", [all_industries] + sorted(get_all_categories()))
+        query_text = st.text_area("Screen Expression", value=QUERY_EXAMPLE, height=80)
+        
+        with st.expander("ℹ️ Query syntax"):
+            st.markdown(
+                "Combine conditions with `and`, `or`, `not` and parentheses. Compare fields with "
+                "`> >= < <= == !=`, chain them (`0 < pb <= 2`) or test membership "
+                "(`cap_type in ('Mid', 'Small')`). Arithmetic `+ - * /` is allowed.\n\n"
+                "`industry.<field>` and `sector.<field>` are peer medians; `benchmark.<key>` is the "
+                "industry benchmark in the same units as the field (e.g. `roe > benchmark.roe`, "
+                "`debt_equity < benchmark.debt_equity`). ROE, margins and dividend yield are stored as fractions."
+            )
+            st.caption("Fields: " + ", ".join(
+                sorted(set(STORE_FUNDAMENTAL_COLUMNS + ['ev_ebitda']) | set(QUERY_FIELD_ALIASES))
+            ))
+        
+        # Results live in the session so grid paging and sorting don't need the button
+        if st.button("🔎 Run Query", type="primary") and query_text.strip():
+            try:
+                start_time = time.time()
+                matches = run_screen_query(query_text, None if query_scope == all_industries else query_scope)
+                elapsed_ms = (time.time() - start_time) * 1000
+            except ValueError as e:
+                st.session_state.pop('query_results', None)
+                st.error(f"❌ {e}")
+            else:
+                st.session_state['query_results'] = {
+                    'id': uuid.uuid4().hex[:8],
+                    'elapsed_ms': elapsed_ms,
+                    'results': pd.DataFrame({
+                        'Ticker': matches['ticker'],
+                        'Name': matches['name'],
+                        'Industry': matches['category'],
+                        'Price': matches['price'],
+                        'Fair Value': matches['fair_value'],
+                        'Upside %': matches['upside'],
+                        'PE Ratio': matches['trailing_pe'],
+                        'ROE %': matches['roe'] * 100,
+                        'From 52W High %': matches['pct_from_high'],
+                        'Cap Type': matches['cap_type'],
+                        'Updated': matches['updated_at']
+                    }) if not matches.empty else pd.DataFrame()
+                }
+        
+        query_results = st.session_state.get('query_results')
+        if query_results:
+            display_df = query_results['results']
+            if display_df.empty:
+                st.warning("❌ No stored stocks match this query. Run screens or refresh industry data to widen the store.")
+            else:
+                st.success(f"✅ {len(display_df):,} stocks matched in {query_results['elapsed_ms']:.0f} ms")
+                show_results_grid(display_df, f"query_{query_results['id']}", SCREEN_COLUMN_CONFIG)
+                
+                st.download_button(
+                    f"📥 Download Results ({len(display_df)} stocks)",
+                    data=display_df.sort_values('Upside %', ascending=False).to_csv(index=False),
+                    file_name=f"NYZTrade_query_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+    
+    elif mode == "⏰ Scheduled Screens":
+        
+        st.markdown("### ⏰ Scheduled Screens")
+        st.caption(
+            f"Saved screens run daily at their scheduled time (server clock). Each run is compared with the "
+            f"previous one; new entrants, drop-outs and upside moves of {SCREEN_ALERT_UPSIDE_CHANGE:.0f}+ points "
+            f"are written to `{SCREEN_ALERTS_DIR}`."
+        )
+        
+        scheduled_strategies = dict(SCREENER_STRATEGY_OPTIONS)
+        
+        with st.sidebar.form("new_saved_screen", clear_on_submit=True):
+            st.markdown("#### ➕ New Saved Screen")
+            new_industry = st.selectbox("Industry", sorted(get_all_categories()))
+            new_strategy = st.selectbox("Strategy", list(scheduled_strategies), format_func=scheduled_strategies.get)
+            new_max_results = st.slider("Max Results", 10, 100, 30)
+            new_time = st.time_input("Run At", value=datetime.strptime("16:00", "%H:%M").time())
+            new_name = st.text_input("Name", placeholder=f"{new_industry} · {new_strategy}")
+            if st.form_submit_button("💾 Save Screen", type="primary"):
+                save_screen(
+                    new_name.strip() or f"{new_industry} · {new_strategy}",
+                    new_industry, new_strategy, new_max_results, new_time.strftime("%H:%M")
+                )
+                st.rerun()
+        
+        saved_screens = list_saved_screens()
+        if not saved_screens:
+            st.info("No saved screens yet. Add one from the sidebar.")
+        else:
+            running = get_screen_scheduler()['running']
+            st.dataframe(pd.DataFrame([{
+                'Name': screen['name'],
+                'Industry': screen['industry'],
+                'Strategy': scheduled_strategies.get(screen['strategy'], screen['strategy']),
+                'Max Results': screen['max_results'],
+                'Run At': screen['schedule_time'],
+                'Enabled': bool(screen['enabled']),
+                'Last Run': (screen['last_run_at'] or '—').replace('T', ' '),
+                'Status': '⏳ Running' if screen['screen_id'] in running else ''
+            } for screen in saved_screens]), use_container_width=True, hide_index=True)
+            
+            selected_screen = st.selectbox(
+                "Saved Screen", saved_screens,
+                format_func=lambda screen: f"{screen['name']} ({screen['schedule_time']})"
+            )
+            screen_id = selected_screen['screen_id']
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("▶️ Run Now", use_container_width=True):
+                    if trigger_saved_screen(screen_id):
+                        st.success("✅ Run started; refresh to see the diff once it finishes.")
+                    else:
+                        st.info("ℹ️ This screen is already running.")
+            with col2:
+                toggle_label = "⏸️ Disable" if selected_screen['enabled'] else "▶️ Enable"
+                if st.button(toggle_label, use_container_width=True):
+                    update_saved_screen(screen_id, enabled=0 if selected_screen['enabled'] else 1)
+                    st.rerun()
+            with col3:
+                if st.button("🗑️ Delete", use_container_width=True):
+                    delete_saved_screen(screen_id)
+                    st.rerun()
+            
+            runs = list_saved_screen_runs(screen_id)
+            if not runs:
+                st.info("This screen has not run yet.")
+            else:
+                st.markdown("#### 📜 Run History")
+                st.dataframe(pd.DataFrame([{
+                    'Run At': run['run_at'].replace('T', ' '),
+                    'Status': run['status'],
+                    'Results': run['result_count'],
+                    'New': run['new_entrants'],
+                    'Dropped': run['drop_outs'],
+                    'Upside Moves': run['upside_changes'],
+                    'Diff File': run['diff_path'] or '—'
+                } for run in runs]), use_container_width=True, hide_index=True)
+                
+                diff_runs = [run for run in runs if run['diff_path'] and os.path.exists(run['diff_path'])]
+                if diff_runs:
+                    diff_run = st.selectbox(
+                        "Show Diff For", diff_runs,
+                        format_func=lambda run: run['run_at'].replace('T', ' ')
+                    )
+                    diff = pd.read_csv(diff_run['diff_path'])
+                    if diff.empty:
+                        st.success("✅ No changes against the previous run.")
+                    else:
+                        st.dataframe(diff.round(2), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            f"📥 Download Diff ({len(diff)} changes)",
+                            data=diff.to_csv(index=False),
+                            file_name=os.path.basename(diff_run['diff_path']),
+                            mime="text/csv",
+                            use_container_width=True
+                        )
+    
+    elif mode == "🧪 Strategy Lab":
         
-        if selected_explore_industry_with_count:
-            explore_industry = selected_explore_industry_with_count.split(" (")[0]  # Extract industry name
-            industry_stocks = get_stocks_by_category(explore_industry)
-            sector = get_sector_for_industry(explore_industry)
+        st.markdown("### 🧪 Strategy Lab")
+        
+        lab_tool = st.sidebar.radio("Lab Tool", ["📈 SuperTrend Sweep", "📊 Strategy Backtest"])
+        
+        if lab_tool == "📈 SuperTrend Sweep":
+            industries = sorted(get_all_categories())
+            sweep_industry = st.sidebar.selectbox("Industry", industries)
+            sweep_ticker = st.sidebar.text_input("Single Ticker (optional)", placeholder="e.g., TCS.NS").upper()
+            sweep_periods = st.sidebar.multiselect("ATR Periods", [5, 7, 10, 14, 20, 30], default=SWEEP_PERIODS)
+            sweep_multipliers = st.sidebar.multiselect(
+                "Multipliers", [1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0], default=SWEEP_MULTIPLIERS
+            )
+            sweep_horizon = st.sidebar.slider("Forward Horizon (bars)", 5, 60, SWEEP_HORIZON)
+            sweep_history = st.sidebar.selectbox("History", ["1y", "2y", "5y"])
             
-            st.info(f"**{explore_industry}** • Sector: {sector} • {len(industry_stocks)} stocks")
+            if st.sidebar.button("🚀 Run Sweep", type="primary") and sweep_periods and sweep_multipliers:
+                sweep_tickers = [sweep_ticker] if sweep_ticker else list(get_stocks_by_category(sweep_industry))
+                
+                with st.spinner(f"Sweeping {len(sweep_periods) * len(sweep_multipliers)} parameter pairs over {len(sweep_tickers)} stocks..."):
+                    start_time = time.time()
+                    sweep_df = run_supertrend_sweep(
+                        sweep_tickers, sorted(sweep_periods), sorted(sweep_multipliers),
+                        sweep_horizon, sweep_history
+                    )
+                    elapsed = time.time() - start_time
+                
+                if sweep_df.empty:
+                    st.warning("❌ Not enough price history for the selected stocks")
+                else:
+                    st.success(f"✅ Evaluated {len(sweep_df)} parameter pairs in {elapsed:.1f}s")
+                    
+                    heatmap = sweep_df.pivot(index='Period', columns='Multiplier', values='Hit Rate %')
+                    fig = px.imshow(
+                        heatmap, text_auto='.1f', aspect='auto',
+                        color_continuous_scale='RdYlGn',
+                        labels={'color': 'Hit Rate %'}
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                    
+                    st.dataframe(
+                        sweep_df.sort_values('Strategy Return %', ascending=False).round(2),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+        
+        elif lab_tool == "📊 Strategy Backtest":
+            strategy_labels = dict(SCREENER_STRATEGY_OPTIONS)
+            all_stored = "All stored stocks"
+            bt_universe = st.sidebar.selectbox("Universe", [all_stored] + sorted(get_all_categories()))
+            bt_strategies = st.sidebar.multiselect(
+                "Strategies", BACKTEST_STRATEGIES, default=BACKTEST_STRATEGIES,
+                format_func=lambda x: strategy_labels[x]
+            )
+            bt_history = st.sidebar.selectbox("History", ["1y", "2y", "5y"], index=1)
+            bt_rebalance = st.sidebar.slider("Rebalance Every (bars)", 5, 63, BACKTEST_REBALANCE_BARS)
+            bt_backfill = st.sidebar.checkbox(
+                "Backfill fair values", value=False,
+                help="Use each stock's first stored fair value for earlier dates (introduces look-ahead bias)"
+            )
             
-            # Show stocks in expandable section
-            if st.expander(f"View all {len(industry_stocks)} stocks"):
-                stocks_df = pd.DataFrame(list(industry_stocks.items()), columns=['Ticker', 'Company'])
-                st.dataframe(stocks_df, use_container_width=True, hide_index=True)
+            if st.sidebar.button("🚀 Run Backtest", type="primary") and bt_strategies:
+                bt_tickers = None if bt_universe == all_stored else list(get_stocks_by_category(bt_universe))
+                
+                with st.spinner("Replaying stored fundamentals against price history..."):
+                    start_time = time.time()
+                    backtest = run_strategy_backtest(bt_tickers, bt_strategies, bt_history, bt_rebalance, bt_backfill)
+                    elapsed = time.time() - start_time
+                
+                if not backtest or backtest['summary'].empty:
+                    st.warning("❌ No stored fundamentals snapshots for this universe yet. Run the screener or refresh industry data first.")
+                else:
+                    st.success(
+                        f"✅ Backtested {backtest['tickers']} stocks from {backtest['snapshots']:,} snapshots "
+                        f"in {elapsed:.1f}s"
+                    )
+                    st.caption(f"First snapshot: {backtest['first_snapshot']}")
+                    
+                    summary = backtest['summary'].copy()
+                    summary['Strategy'] = summary['Strategy'].map(lambda x: strategy_labels.get(x, "🌐 Equal-Weight Universe"))
+                    st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
+                    
+                    equity = backtest['equity'].rename(columns=lambda x: strategy_labels.get(x, "🌐 Equal-Weight Universe"))
+                    fig = px.line(equity, labels={'value': 'Growth of 1', 'index': 'Date', 'variable': 'Strategy'})
+                    st.plotly_chart(fig, use_container_width=True)
     
     else:
         # Welcome screen
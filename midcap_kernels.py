@@ -0,0 +1,106 @@
+"""Column-wise indicator kernels for the NYZTrade dashboard.
+
+Pure NumPy/pandas functions over aligned (dates x tickers) matrices, kept
+apart from the Streamlit app so they can be imported and tested without
+running it.
+"""
+import numpy as np
+import pandas as pd
+
+# Bars in the 52-week high/low window
+BARS_52W = 252
+
+# RSI / MACD periods
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+
+def right_align(matrix, valid):
+    """Move each column's valid rows to the bottom, keeping their order.
+    
+    After alignment the last row is every ticker's own latest bar and rolling
+    windows span consecutive trading bars of that ticker, exactly as if each
+    history had been processed on its own.
+    """
+    order = np.argsort(valid, axis=0, kind='stable')
+    return np.take_along_axis(matrix, order, axis=0)
+
+def atr_matrix(high, low, close, period):
+    """Column-wise ATR (rolling mean of true range) on (dates x tickers) arrays"""
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return pd.DataFrame(tr).rolling(window=period).mean().to_numpy()
+
+def supertrend_matrix(high, low, close, period=10, multiplier=3):
+    """Column-wise SuperTrend on (dates x tickers) arrays"""
+    return supertrend_from_atr(high, low, close, atr_matrix(high, low, close, period), multiplier)
+
+def supertrend_from_atr(high, low, close, atr, multiplier):
+    """Band carry-forward and direction for precomputed ATR.
+    
+    multiplier may be a scalar or one value per column, which lets a
+    parameter sweep reuse one ATR matrix across many multipliers.
+    """
+    hl_avg = (high + low) / 2
+    final_upper = hl_avg + multiplier * atr
+    final_lower = hl_avg - multiplier * atr
+    line = np.full_like(close, np.nan)
+    direction = np.full_like(close, np.nan)
+    
+    # Sequential in time, vectorized across tickers
+    for i in range(1, len(close)):
+        curr_upper = final_upper[i]
+        curr_lower = final_lower[i]
+        valid = ~(np.isnan(curr_upper) | np.isnan(curr_lower))
+        prev_upper = final_upper[i - 1]
+        prev_lower = final_lower[i - 1]
+        
+        with np.errstate(invalid='ignore'):
+            restart_upper = np.isnan(prev_upper) | (curr_upper < prev_upper) | (close[i - 1] > prev_upper)
+            restart_lower = np.isnan(prev_lower) | (curr_lower > prev_lower) | (close[i - 1] < prev_lower)
+            final_upper[i] = np.where(valid & ~restart_upper, prev_upper, curr_upper)
+            final_lower[i] = np.where(valid & ~restart_lower, prev_lower, curr_lower)
+            
+            bullish = np.where(
+                direction[i - 1] == 1,
+                ~(close[i] < final_lower[i]),
+                close[i] > final_upper[i]
+            )
+        direction[i] = np.where(valid, np.where(bullish, 1.0, -1.0), np.nan)
+        line[i] = np.where(valid, np.where(bullish, final_lower[i], final_upper[i]), np.nan)
+    
+    return final_upper, final_lower, line, direction
+
+def compute_momentum_matrix(close, rsi_period=RSI_PERIOD, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """Wilder RSI, MACD, signal line and histogram for every ticker column.
+    
+    Takes an aligned (dates x tickers) close matrix and returns 1-D arrays for
+    each ticker's latest bar, plus the previous histogram value for crossovers.
+    """
+    valid = ~np.isnan(close)
+    closes = pd.DataFrame(right_align(close, valid))
+    
+    delta = closes.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = rsi.where(avg_loss > 0, 100.0).where(avg_gain.notna())
+    
+    macd = (
+        closes.ewm(span=fast, min_periods=fast, adjust=False).mean()
+        - closes.ewm(span=slow, min_periods=slow, adjust=False).mean()
+    )
+    macd_signal = macd.ewm(span=signal, min_periods=signal, adjust=False).mean()
+    macd_hist = macd - macd_signal
+    
+    return {
+        'bars': valid.sum(axis=0),
+        'rsi': rsi.to_numpy()[-1],
+        'macd': macd.to_numpy()[-1],
+        'macd_signal': macd_signal.to_numpy()[-1],
+        'macd_hist': macd_hist.to_numpy()[-1],
+        'prev_macd_hist': macd_hist.to_numpy()[-2] if len(macd_hist) > 1 else np.full(close.shape[1], np.nan)
+    }
@@ -0,0 +1,81 @@
+"""Tests for streaming indicator state and its batch bootstrap"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('NYZTRADE_DATA_DIR', tempfile.mkdtemp(prefix='nyztrade-test-'))
+
+import midcap_app as app
+
+FIELDS = ['High', 'Low', 'Close', 'Volume']
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2025-01-01', periods=320)
+    tickers = ['LONG.NS', 'GAPPY.NS', 'SHORT.NS', 'TINY.NS', 'EMPTY.NS']
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), len(tickers))), axis=0))
+    spread = close * rng.uniform(0.005, 0.03, close.shape)
+    frames = {
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.uniform(1e5, 1e6, close.shape)
+    }
+    frames = {field: pd.DataFrame(values, index=dates, columns=tickers) for field, values in frames.items()}
+    for field in FIELDS:
+        frames[field].iloc[::7, 1] = np.nan
+        frames[field].iloc[:-60, 2] = np.nan
+        frames[field].iloc[:-6, 3] = np.nan
+        frames[field].iloc[:, 4] = np.nan
+    frames['Volume'].iloc[-3, 0] = np.nan
+    return frames
+
+
+def folded_state(prices, ticker, before):
+    state = app.new_indicator_state()
+    for date in prices['Close'].index:
+        if date.strftime('%Y-%m-%d') >= before:
+            break
+        bar = [prices[field].at[date, ticker] for field in FIELDS]
+        app.update_indicator_state(state, date.strftime('%Y-%m-%d'), *bar)
+    return state
+
+
+def test_batch_bootstrap_matches_streaming_fold(prices):
+    before = prices['Close'].index[-2].strftime('%Y-%m-%d')
+    tickers = list(prices['Close'].columns)
+    seeded = app.build_indicator_states(prices, tickers, before)
+
+    assert 'EMPTY.NS' not in seeded
+    for ticker in tickers[:-1]:
+        expected = folded_state(prices, ticker, before)
+        state = seeded[ticker]
+        for key in ['last_date', 'bars', 'direction', 'highs_52w', 'lows_52w']:
+            assert state[key] == expected[key], (ticker, key)
+        for key in ['prev_close', 'tr_sum', 'close_sum_20', 'close_sum_50', 'volume_sum_20',
+                    'final_upper', 'final_lower', 'supertrend']:
+            assert state[key] == pytest.approx(expected[key]), (ticker, key)
+        for key in ['trs', 'closes', 'volumes']:
+            assert list(state[key]) == pytest.approx(list(expected[key])), (ticker, key)
+        assert app.indicator_state_signals(state) == app.indicator_state_signals(expected)
+
+
+def test_seeded_state_round_trips_and_keeps_streaming(prices):
+    dates = prices['Close'].index.strftime('%Y-%m-%d')
+    seeded = app.build_indicator_states(prices, ['LONG.NS'], dates[-1])['LONG.NS']
+    restored = app._state_from_json(app._state_to_json(seeded))
+    expected = folded_state(prices, 'LONG.NS', dates[-1])
+
+    bar = [prices[field]['LONG.NS'].iloc[-1] for field in FIELDS]
+    app.update_indicator_state(restored, dates[-1], *bar)
+    app.update_indicator_state(expected, dates[-1], *bar)
+    assert restored['bars'] == expected['bars']
+    assert restored['supertrend'] == pytest.approx(expected['supertrend'])
+    assert restored['highs_52w'] == expected['highs_52w']
@@ -0,0 +1,52 @@
+"""Tests for relative valuation ranks and the picks table"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('NYZTRADE_DATA_DIR', tempfile.mkdtemp(prefix='nyztrade-test-'))
+
+import midcap_app as app
+
+
+@pytest.fixture
+def ranked():
+    df = pd.DataFrame({
+        'ticker': ['AAA.NS', 'BBB.NS', 'CCC.NS', 'DDD.NS'],
+        'name': ['Aaa', 'Bbb', 'Ccc', 'Ddd'],
+        'category': ['Banks', 'Banks', 'Banks', 'Banks'],
+        'sector': ['Financials'] * 4,
+        'price': [100.0, 200.0, 300.0, 400.0],
+        'upside': [25.0, 5.0, 40.0, -10.0],
+        'trailing_pe': [12.0, 30.0, 20.0, 45.0],
+        'pb_ratio': [1.0, 2.0, 3.0, 4.0],
+        'ev_ebitda': [8.0, 9.0, 10.0, 11.0],
+        'roe': [0.18, 0.10, 0.25, 0.30],
+        'profit_margin': [0.1, 0.2, 0.3, 0.4],
+        'updated_at': ['2026-01-01'] * 4
+    })
+    return app.compute_relative_ranks(df)
+
+
+def test_pe_table_columns(ranked):
+    picks = app.screen_relative_decile(ranked, 'pe', 'industry', 5)
+    table = app.relative_valuation_table(picks, 'pe', 'PE Ratio', 'industry')
+    assert list(table.columns) == [
+        'Ticker', 'Name', 'Industry', 'Sector', 'Price', 'Upside %',
+        'PE Ratio', 'Peer Percentile', 'Updated'
+    ]
+    assert list(table['Ticker']) == ['AAA.NS', 'CCC.NS']
+
+
+def test_upside_metric_has_no_duplicate_columns(ranked):
+    picks = app.screen_relative_decile(ranked, 'upside', 'sector', 5)
+    table = app.relative_valuation_table(picks, 'upside', 'Upside', 'sector')
+    assert table.columns.is_unique
+    assert list(table.columns) == [
+        'Ticker', 'Name', 'Industry', 'Sector', 'Price', 'Upside',
+        'Peer Percentile', 'Updated'
+    ]
+    assert list(table['Ticker']) == ['CCC.NS', 'AAA.NS']
@@ -0,0 +1,82 @@
+"""Tests for the custom screen query compiler"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('NYZTRADE_DATA_DIR', tempfile.mkdtemp(prefix='nyztrade-test-'))
+
+import midcap_app as app
+
+
+@pytest.fixture
+def fundamentals(monkeypatch):
+    df = pd.DataFrame({
+        'ticker': ['AAA.NS', 'BBB.NS', 'CCC.NS', 'DDD.NS'],
+        'category': ['Banks', 'Banks', 'IT', 'IT'],
+        'sector': ['Financials', 'Financials', 'Technology', 'Technology'],
+        'cap_type': ['Mid', 'Small', 'Mid', 'Large'],
+        'upside': [25.0, 5.0, 40.0, -10.0],
+        'roe': [0.18, 0.10, 0.25, 0.30],
+        'trailing_pe': [12.0, 30.0, 20.0, 45.0],
+        'debt_to_equity': [30.0, 80.0, 40.0, 120.0]
+    })
+    monkeypatch.setattr(app, 'load_fundamentals_table', lambda category=None: df)
+    # Benchmark units: percent ROE and plain D/E ratios
+    monkeypatch.setattr(app, 'get_industry_benchmarks', lambda industry, cap_type='Large': {
+        'pe': 20.0, 'roe': 16.0, 'debt_equity': 0.5, 'version': 'static'
+    })
+    return df
+
+
+def matches(expression):
+    return list(app.run_screen_query(expression)['ticker'])
+
+
+def test_comparisons_and_aliases(fundamentals):
+    assert matches("upside >= 20 and pe < 25") == ['AAA.NS', 'CCC.NS']
+    assert matches("0 < upside < 30") == ['AAA.NS', 'BBB.NS']
+    assert matches("not upside > 0") == ['DDD.NS']
+
+
+def test_in_and_peer_medians(fundamentals):
+    assert matches("cap_type in ('Mid', 'Small')") == ['AAA.NS', 'BBB.NS', 'CCC.NS']
+    assert matches("cap_type not in ['Mid']") == ['BBB.NS', 'DDD.NS']
+    assert matches("roe > industry.roe") == ['AAA.NS', 'DDD.NS']
+
+
+def test_benchmarks_compare_in_store_units(fundamentals):
+    assert matches("pe < benchmark.pe") == ['AAA.NS']
+    assert matches("roe > benchmark.roe") == ['AAA.NS', 'CCC.NS', 'DDD.NS']
+    assert matches("debt_equity < benchmark.debt_equity") == ['AAA.NS', 'CCC.NS']
+
+
+@pytest.mark.parametrize('expression', [
+    "'Mid' in ('Mid',)",
+    "upside > benchmark.unknown",
+    "upside > benchmark.version",
+    "upside > 5 in (5,)",
+    "cap_type in cap_type",
+    "upside >= ",
+    "__import__('os').system('true')",
+    "upside.real > 1",
+    "upside is None",
+    "unknown_field > 1"
+])
+def test_rejected_queries_raise_value_error(fundamentals, expression):
+    with pytest.raises(ValueError):
+        app.run_screen_query(expression)
+
+
+@pytest.mark.parametrize('expression', [
+    "upside > 1/0",
+    "upside > 'a' * 'b'",
+    "upside + 1",
+    "1 < 2"
+])
+def test_runtime_errors_become_value_error(fundamentals, expression):
+    with pytest.raises(ValueError):
+        app.run_screen_query(expression)